@@ -0,0 +1,96 @@
+"""Compare FLAC decoding through sr.AudioFile with the in-process decoder
+
+    python benchmarks/flac_decode.py --count 16 --seconds 60 --workers 4
+    python benchmarks/flac_decode.py --files recordings/*.flac
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import speech_recognition as sr
+
+from src.flac_decoder import (
+    FlacDecoder,
+    decode_files_parallel,
+    decode_flac,
+    native_flac_available,
+)
+from src.load_test import SyntheticSource
+
+
+def make_files(directory, count, seconds):
+    """Write ``count`` FLAC files of a ``seconds``-long tone"""
+    flac_data = SyntheticSource(duration=seconds).audio.get_flac_data()
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"tone-{index}.flac")
+        with open(path, 'wb') as f:
+            f.write(flac_data)
+        paths.append(path)
+    return paths
+
+
+def decode_with_audio_file(path):
+    with sr.AudioFile(path) as source:
+        return sr.Recognizer().record(source)
+
+
+def cpu_seconds():
+    """CPU time of this process and its finished children, e.g. flac"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def run(label, func, paths, audio_seconds):
+    started_wall = time.perf_counter()
+    started_cpu = cpu_seconds()
+    func(paths)
+    wall = time.perf_counter() - started_wall
+    cpu = cpu_seconds() - started_cpu
+    print(f"{label:<28} {wall:8.3f} s wall {cpu:8.3f} s cpu {audio_seconds / wall:10.0f}x realtime")
+    return wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="+", help="FLAC files to decode (default: generated)")
+    parser.add_argument("--count", type=int, default=16, help="Generated files (default: 16)")
+    parser.add_argument("--seconds", type=float, default=60.0,
+                        help="Length of each generated file (default: 60)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Threads for the parallel runs (default: CPU count)")
+    args = parser.parse_args()
+
+    if not native_flac_available():
+        raise SystemExit("Install soundfile to benchmark the native decoder")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = args.files or make_files(directory, args.count, args.seconds)
+        audio_seconds = 0.0
+        for path in paths:
+            with FlacDecoder(path) as decoder:
+                audio_seconds += decoder.duration
+        print(f"{len(paths)} files, {audio_seconds:.0f} s of audio, {args.workers} workers")
+
+        def subprocess_parallel(items):
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                list(executor.map(decode_with_audio_file, items))
+
+        baseline = run("sr.AudioFile", lambda items: [decode_with_audio_file(p) for p in items],
+                       paths, audio_seconds)
+        run("sr.AudioFile, threaded", subprocess_parallel, paths, audio_seconds)
+        native = run("decode_flac", lambda items: [decode_flac(p) for p in items],
+                     paths, audio_seconds)
+        parallel = run("decode_files_parallel",
+                       lambda items: decode_files_parallel(items, args.workers),
+                       paths, audio_seconds)
+        print(f"speedup: {baseline / native:.1f}x serial, {baseline / parallel:.1f}x parallel")
+
+
+if __name__ == "__main__":
+    main()
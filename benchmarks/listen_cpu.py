@@ -0,0 +1,119 @@
+"""Compare listening CPU per stream, per chunk against batched energy scans
+
+    python benchmarks/listen_cpu.py --seconds 120 --speed 10
+    python benchmarks/listen_cpu.py --session recordings/call.vrs --speed 4
+
+Audio is played back paced like a live device (``--speed`` times real
+time), so the numbers include the per-read thread wake-ups a microphone
+causes, not only the energy arithmetic. Wake-ups dominate: NumPy only
+matches audioop per sample, and the gain comes from scanning a block of
+chunks per wake-up.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import speech_recognition as sr
+
+from src.audio_sources import BufferedMicrophoneSource
+from src.fast_listener import DEFAULT_SCAN_SECONDS, FastListener
+from src.session_replay import ReplayMicrophone, Session
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+ENERGY_THRESHOLD = 1000
+
+
+def make_session(seconds):
+    """Background noise with a two-second burst of speech-level audio every six seconds"""
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal(int(seconds * SAMPLE_RATE)) * 200
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    samples[(t % 6) < 2] *= 20
+    pcm = np.clip(samples, -32768, 32767).astype('<i2').tobytes()
+    chunk_bytes = CHUNK * 2
+    frames = [((offset + chunk_bytes) / (SAMPLE_RATE * 2), pcm[offset:offset + chunk_bytes])
+              for offset in range(0, len(pcm), chunk_bytes)]
+    return Session(SAMPLE_RATE, 2, frames)
+
+
+def microphone_listen(session, speed, listener=None):
+    """Phrases through ``Recognizer.listen``, or a ``listener`` class if given"""
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = ENERGY_THRESHOLD
+    listen = listener(recognizer).listen if listener else recognizer.listen
+    microphone = ReplayMicrophone(session, speed, CHUNK)
+    phrases = 0
+    with microphone as source:
+        while not source.stream.finished:
+            try:
+                audio = listen(source, timeout=1)
+            except sr.WaitTimeoutError:
+                continue
+            if audio.frame_data:
+                phrases += 1
+    return phrases
+
+
+def buffered_listen(session, speed, scan_seconds):
+    source = BufferedMicrophoneSource(microphone=ReplayMicrophone(session, speed, CHUNK))
+    source.recognizer.energy_threshold = ENERGY_THRESHOLD
+    source.scan_seconds = scan_seconds
+    phrases = 0
+    try:
+        while True:
+            try:
+                audio = source.listen(timeout=1)
+            except sr.WaitTimeoutError:
+                continue
+            if audio is None:
+                break
+            phrases += 1
+    finally:
+        source.stop()
+    return phrases
+
+
+def run(label, func, audio_seconds):
+    started_wall = time.perf_counter()
+    started_cpu = time.process_time()
+    phrases = func()
+    wall = time.perf_counter() - started_wall
+    cpu = time.process_time() - started_cpu
+    print(f"{label:<40} {wall:8.2f} s wall {cpu:8.3f} s cpu "
+          f"{100.0 * cpu / audio_seconds:7.3f}% per stream {phrases:5d} phrases")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--session", help="Recorded session to play (default: generated)")
+    parser.add_argument("--seconds", type=float, default=120.0,
+                        help="Length of the generated session (default: 120)")
+    parser.add_argument("--speed", type=float, default=10.0,
+                        help="Playback speed, times real time (default: 10)")
+    args = parser.parse_args()
+
+    session = Session.load(args.session) if args.session else make_session(args.seconds)
+    audio_seconds = session.duration
+    print(f"{audio_seconds:.0f} s of audio at {args.speed:g}x real time")
+
+    direct = run("Recognizer.listen",
+                 lambda: microphone_listen(session, args.speed), audio_seconds)
+    fast = run("FastListener",
+               lambda: microphone_listen(session, args.speed, FastListener), audio_seconds)
+    per_chunk = run("BufferedMicrophoneSource, per chunk",
+                    lambda: buffered_listen(session, args.speed, 0.0), audio_seconds)
+    scanned = run(f"BufferedMicrophoneSource, {DEFAULT_SCAN_SECONDS:g} s scans",
+                  lambda: buffered_listen(session, args.speed, DEFAULT_SCAN_SECONDS),
+                  audio_seconds)
+    print(f"CPU: {direct / fast:.1f}x less for MicrophoneSource, "
+          f"{per_chunk / scanned:.1f}x less for BufferedMicrophoneSource")
+
+
+if __name__ == "__main__":
+    main()
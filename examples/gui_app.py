@@ -2,11 +2,13 @@ import sys
 sys.path.insert(0, '..')
 
 from src.gui import VoiceRecognitionGUI
-from src import VoiceRecognitionSystem, GoogleRecognitionEngine
+from src import VoiceRecognitionSystem, GoogleRecognitionEngine, configure_logging
 import tkinter as tk
 
 
 def main():
+    configure_logging()
+    
     # Create recognition system
     engine = GoogleRecognitionEngine()
     vr_system = VoiceRecognitionSystem(engine)
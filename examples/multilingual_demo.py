@@ -1,10 +1,12 @@
 import sys
 sys.path.insert(0, '..')
 
-from src import VoiceRecognitionSystem, GoogleRecognitionEngine, LanguageCode
+from src import VoiceRecognitionSystem, GoogleRecognitionEngine, LanguageCode, configure_logging
 
 
 def main():
+    configure_logging()
+    
     print("Multilingual Voice Recognition Demo")
     print("=" * 50)
     
@@ -10,7 +10,12 @@ setup(
         "SpeechRecognition>=3.10.0",
         "pyaudio>=0.2.13",
         "pocketsphinx>=5.0.0",
+        "numpy>=1.21.0",
     ],
+    extras_require={
+        # In-process FLAC decoding instead of the flac command-line tool
+        "flac": ["soundfile>=0.12.0"],
+    },
     python_requires=">=3.7",
     classifiers=[
         "Programming Language :: Python :: 3",
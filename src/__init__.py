@@ -1,8 +1,46 @@
 from .main import VoiceRecognitionSystem
 from .models import RecognitionResult
 from .constants import LanguageCode
-from .audio_sources import MicrophoneSource, FileSource
-from .recognition_engines import GoogleRecognitionEngine, SphinxRecognitionEngine
+from .audio_sources import MicrophoneSource, BufferedMicrophoneSource, FileSource
+from .fast_listener import FastListener
+from .flac_decoder import FlacDecoder, decode_files_parallel
+from .recognition_engines import (
+    GoogleRecognitionEngine,
+    SphinxRecognitionEngine,
+    StreamingSphinxEngine,
+)
+from .wake_word import WakeWordDetector, WakeWordSource
+from .cancellation import CancellationToken, RequestCancelled, DeadlineExceeded
+from .concurrency import AdaptiveLimiter, LimitedRecognitionEngine
+from .log_pipeline import configure_logging, shutdown_logging
+from .fingerprint import FingerprintIndex, compute_fingerprint
+from .engine_router import EngineRouter, ModelCache, SphinxModel
+from .audio_archive import AudioArchive, ArchiveEntry
+from .capture_manager import CaptureManager
+from .result_sinks import (
+    ResultSink,
+    SinkWorker,
+    JsonlFileSink,
+    SQLiteSink,
+    CallbackSink,
+    WebhookSink,
+)
+from .distributed_batch import WorkQueue, BatchWorker, merge_results
+from .session_replay import (
+    SessionRecorder,
+    Session,
+    ReplayMicrophone,
+    ReplaySource,
+    replay_concurrently,
+)
+from .load_test import (
+    LoadGenerator,
+    LoadTestReport,
+    SourcePool,
+    SyntheticSource,
+    MockRecognitionServer,
+    HttpRecognitionEngine,
+)
 
 __version__ = "1.0.0"
 __all__ = [
@@ -10,7 +48,49 @@ __all__ = [
     "RecognitionResult",
     "LanguageCode",
     "MicrophoneSource",
+    "BufferedMicrophoneSource",
     "FileSource",
+    "FastListener",
+    "FlacDecoder",
+    "decode_files_parallel",
     "GoogleRecognitionEngine",
     "SphinxRecognitionEngine",
+    "StreamingSphinxEngine",
+    "WakeWordDetector",
+    "WakeWordSource",
+    "CancellationToken",
+    "RequestCancelled",
+    "DeadlineExceeded",
+    "AdaptiveLimiter",
+    "LimitedRecognitionEngine",
+    "EngineRouter",
+    "ModelCache",
+    "SphinxModel",
+    "AudioArchive",
+    "ArchiveEntry",
+    "CaptureManager",
+    "ResultSink",
+    "SinkWorker",
+    "JsonlFileSink",
+    "SQLiteSink",
+    "CallbackSink",
+    "WebhookSink",
+    "WorkQueue",
+    "BatchWorker",
+    "merge_results",
+    "SessionRecorder",
+    "Session",
+    "ReplayMicrophone",
+    "ReplaySource",
+    "replay_concurrently",
+    "LoadGenerator",
+    "LoadTestReport",
+    "SourcePool",
+    "SyntheticSource",
+    "MockRecognitionServer",
+    "HttpRecognitionEngine",
+    "FingerprintIndex",
+    "compute_fingerprint",
+    "configure_logging",
+    "shutdown_logging",
 ]
\ No newline at end of file
@@ -0,0 +1,274 @@
+import speech_recognition as sr
+from bisect import bisect_left, insort
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import io
+import json
+import logging
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from .flac_decoder import FlacDecoder, native_flac_available, soundfile
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+CHUNK_FILE_FORMAT = "chunk-{:06d}.dat"
+CODECS = ("flac", "zlib")
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """Location of one compressed segment in the archive"""
+
+    result_id: str
+    timestamp: datetime
+    language: str
+    chunk: int
+    offset: int
+    length: int
+    raw_length: int
+    sample_rate: int
+    sample_width: int
+    crc32: int
+    # Entries written before FLAC support have no codec field
+    codec: str = "zlib"
+
+    @property
+    def duration(self) -> float:
+        return self.raw_length / (self.sample_rate * self.sample_width)
+
+    def to_json(self) -> str:
+        entry = asdict(self)
+        entry["timestamp"] = self.timestamp.isoformat()
+        return json.dumps(entry, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> "ArchiveEntry":
+        entry = json.loads(line)
+        entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+        return cls(**entry)
+
+
+def _encode_flac(audio: sr.AudioData) -> bytes:
+    if soundfile is None:
+        return audio.get_flac_data()
+    output = io.BytesIO()
+    samples = np.frombuffer(audio.get_raw_data(), dtype='<i2')
+    soundfile.write(output, samples, audio.sample_rate, format='FLAC', subtype='PCM_16')
+    return output.getvalue()
+
+
+def _decode_flac(data: bytes) -> sr.AudioData:
+    if native_flac_available():
+        with FlacDecoder(io.BytesIO(data)) as decoder:
+            return decoder.read()
+    with sr.AudioFile(io.BytesIO(data)) as source:
+        return sr.Recognizer().record(source)
+
+
+class AudioArchive:
+    """Append-only store of captured audio, addressable by result ID
+
+    Each segment is compressed on its own and appended to the current
+    chunk file; a new chunk is started once it reaches ``chunk_size``.
+    16-bit audio is stored as FLAC by default, which is lossless and
+    compresses speech far better than zlib; other sample widths, or
+    ``codec="zlib"``, use zlib. An index line with the chunk, offset and
+    length is written after the segment is flushed, so a crash can leave
+    unindexed bytes at the end of a chunk but never an index entry
+    pointing at missing data. A torn last index line is cut off on load.
+    Reading one segment seeks straight to it and decodes only that segment.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 chunk_size: int = 256 * 1024 * 1024,
+                 compression_level: int = 6,
+                 codec: str = "flac"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive codec: {codec}")
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+        self.codec = codec
+        self._entries: Dict[str, ArchiveEntry] = {}
+        self._by_time: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+        self._chunk = max((entry.chunk for entry in self._entries.values()), default=0)
+        self._chunk_file = None
+        self._index_file = open(self._path(INDEX_FILE), 'a', encoding='utf-8')
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _chunk_path(self, chunk: int) -> str:
+        return self._path(CHUNK_FILE_FORMAT.format(chunk))
+
+    def _load_index(self):
+        index_path = self._path(INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, 'r+b') as f:
+            line_number = 0
+            complete = 0
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    # A torn final line from an interrupted append; cut it
+                    # off so the next entry starts on a line of its own
+                    logger.warning("Truncating torn archive index line %d", line_number + 1)
+                    f.truncate(complete)
+                    break
+                line_number += 1
+                complete += len(line)
+                try:
+                    entry = ArchiveEntry.from_json(line.decode('utf-8'))
+                except (ValueError, TypeError, KeyError):
+                    logger.warning("Skipping unreadable archive index line %d", line_number)
+                    continue
+                self._add_entry(entry)
+
+    def _add_entry(self, entry: ArchiveEntry):
+        self._entries[entry.result_id] = entry
+        insort(self._by_time, (entry.timestamp, entry.result_id))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, result_id: str) -> bool:
+        return result_id in self._entries
+
+    def append(self,
+               result_id: str,
+               audio: sr.AudioData,
+               language: str,
+               timestamp: Optional[datetime] = None) -> ArchiveEntry:
+        """Compress and store ``audio`` under ``result_id``"""
+        raw_data = audio.get_raw_data()
+        codec = self.codec if audio.sample_width == 2 else "zlib"
+        if codec == "flac":
+            compressed = _encode_flac(audio)
+        else:
+            compressed = zlib.compress(raw_data, self.compression_level)
+        with self._lock:
+            if result_id in self._entries:
+                raise ValueError(f"Audio for {result_id} is already archived")
+            chunk_file = self._writable_chunk(len(compressed))
+            offset = chunk_file.tell()
+            chunk_file.write(compressed)
+            chunk_file.flush()
+
+            entry = ArchiveEntry(
+                result_id=result_id,
+                timestamp=timestamp or datetime.now(),
+                language=language,
+                chunk=self._chunk,
+                offset=offset,
+                length=len(compressed),
+                raw_length=len(raw_data),
+                sample_rate=audio.sample_rate,
+                sample_width=audio.sample_width,
+                crc32=zlib.crc32(raw_data),
+                codec=codec,
+            )
+            self._index_file.write(entry.to_json() + "\n")
+            self._index_file.flush()
+            self._add_entry(entry)
+            return entry
+
+    def _writable_chunk(self, size: int):
+        if self._chunk_file is None:
+            self._chunk_file = open(self._chunk_path(self._chunk), 'ab')
+        if self._chunk_file.tell() and self._chunk_file.tell() + size > self.chunk_size:
+            self._chunk_file.close()
+            self._chunk += 1
+            self._chunk_file = open(self._chunk_path(self._chunk), 'ab')
+        return self._chunk_file
+
+    def entry(self, result_id: str) -> ArchiveEntry:
+        try:
+            return self._entries[result_id]
+        except KeyError:
+            raise KeyError(f"No archived audio for {result_id}")
+
+    def get(self, result_id: str) -> sr.AudioData:
+        """Read and decompress the audio stored under ``result_id``"""
+        entry = self.entry(result_id)
+        with open(self._chunk_path(entry.chunk), 'rb') as f:
+            return self._read(f, entry)
+
+    def _read(self, chunk_file, entry: ArchiveEntry) -> sr.AudioData:
+        chunk_file.seek(entry.offset)
+        data = chunk_file.read(entry.length)
+        if entry.codec == "flac":
+            raw_data = _decode_flac(data).get_raw_data()
+        else:
+            raw_data = zlib.decompress(data)
+        if zlib.crc32(raw_data) != entry.crc32:
+            raise ValueError(f"Archived audio for {entry.result_id} is corrupt")
+        return sr.AudioData(raw_data, entry.sample_rate, entry.sample_width)
+
+    def find(self,
+             start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> List[ArchiveEntry]:
+        """Entries captured in ``[start, end)``, oldest first"""
+        with self._lock:
+            low = 0 if start is None else bisect_left(self._by_time, (start,))
+            high = len(self._by_time) if end is None else bisect_left(self._by_time, (end,))
+            return [self._entries[result_id] for _, result_id in self._by_time[low:high]]
+
+    def iter_audio(self,
+                   entries: Optional[Iterable[ArchiveEntry]] = None
+                   ) -> Iterator[Tuple[ArchiveEntry, sr.AudioData]]:
+        """Yield ``(entry, audio)`` for many entries in storage order
+
+        Reads are sorted by chunk and offset and each chunk file is opened
+        once, so bulk scans read the archive sequentially.
+        """
+        if entries is None:
+            entries = self.find()
+        ordered = sorted(entries, key=lambda entry: (entry.chunk, entry.offset))
+        chunk, chunk_file = None, None
+        try:
+            for entry in ordered:
+                if entry.chunk != chunk:
+                    if chunk_file is not None:
+                        chunk_file.close()
+                    chunk, chunk_file = entry.chunk, open(self._chunk_path(entry.chunk), 'rb')
+                yield entry, self._read(chunk_file, entry)
+        finally:
+            if chunk_file is not None:
+                chunk_file.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            raw_bytes = sum(entry.raw_length for entry in self._entries.values())
+            stored_bytes = sum(entry.length for entry in self._entries.values())
+            return {
+                "segments": len(self._entries),
+                "chunks": self._chunk + 1 if self._entries else 0,
+                "raw_bytes": raw_bytes,
+                "stored_bytes": stored_bytes,
+                "compression_ratio": raw_bytes / stored_bytes if stored_bytes else 0.0,
+                "codec": self.codec,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._chunk_file is not None:
+                self._chunk_file.close()
+                self._chunk_file = None
+            self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,6 +1,30 @@
 import speech_recognition as sr
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Optional
 import logging
+import math
+import threading
+
+import numpy as np
+
+from .fast_listener import (
+    DEFAULT_BLOCK_SECONDS,
+    DEFAULT_SCAN_SECONDS,
+    FastListener,
+    chunk_energies,
+    dynamic_thresholds,
+    find_onset,
+    pause_runs,
+)
+from .flac_decoder import decode_flac, is_flac, native_flac_available
+from .ring_buffer import PCMRingBuffer
+from .profiling import stage
+from .cancellation import CancellationToken, RequestCancelled, run_cancellable
+
+if TYPE_CHECKING:
+    from .session_replay import SessionRecorder
+
+
+logger = logging.getLogger(__name__)
 
 
 class AudioSource:
@@ -11,32 +35,461 @@ class AudioSource:
     def get_audio(self) -> Optional[sr.AudioData]:
         raise NotImplementedError("Subclasses must implement get_audio()")
 
+    def get_audio_cancellable(self, token: Optional[CancellationToken]) -> Optional[sr.AudioData]:
+        """``get_audio`` that returns promptly once ``token`` is cancelled
+
+        By default a blocked capture is abandoned on a worker thread;
+        sources that can check the token themselves override this.
+        """
+        return run_cancellable(token, self.get_audio)
+
+
+class _RecordingStream:
+    """Device stream wrapper that writes every frame read to a recorder"""
+
+    def __init__(self, stream, recorder: "SessionRecorder", sample_rate: int, sample_width: int):
+        self.stream = stream
+        self._recorder = recorder
+        self._sample_rate = sample_rate
+        self._sample_width = sample_width
+
+    def read(self, size: int) -> bytes:
+        data = self.stream.read(size)
+        if data:
+            self._recorder.write(data, self._sample_rate, self._sample_width)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
 
 class MicrophoneSource(AudioSource):
 
-    def __init__(self, device_index: Optional[int] = None):
+    def __init__(self,
+                 device_index: Optional[int] = None,
+                 microphone: Optional[sr.AudioSource] = None,
+                 recorder: Optional["SessionRecorder"] = None):
         super().__init__()
         self.device_index = device_index
-        self.microphone = sr.Microphone(device_index=device_index)
+        # Any sr.AudioSource with a readable stream can stand in for the
+        # device, e.g. a ReplayMicrophone for headless load tests
+        self.microphone = microphone or sr.Microphone(device_index=device_index)
+        # When set, every frame read from the device is also written to a
+        # session file, so a replay sees the same reads and silences
+        self.recorder = recorder
+        self.listener = FastListener(self.recognizer)
+        self._recording_stream: Optional[_RecordingStream] = None
     
     def get_audio(self, duration: Optional[float] = None, 
-                  phrase_time_limit: Optional[float] = None) -> Optional[sr.AudioData]:
+                  phrase_time_limit: Optional[float] = None,
+                  token: Optional[CancellationToken] = None) -> Optional[sr.AudioData]:
         """Capture audio from microphone"""
+        if token is not None and token.remaining() is not None:
+            remaining = token.remaining()
+            duration = remaining if duration is None else min(duration, remaining)
         try:
             with self.microphone as source:
-                print("Adjusting for ambient noise... Please wait.")
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                print("Listening... Speak now!")
-                
-                audio = self.recognizer.listen(
-                    source,
-                    timeout=duration,
-                    phrase_time_limit=phrase_time_limit
+                stream = source.stream
+                if self.recorder is not None:
+                    source.stream = self._recording(source)
+                try:
+                    print("Adjusting for ambient noise... Please wait.")
+                    self.listener.adjust_for_ambient_noise(source, duration=1, token=token)
+                    print("Listening... Speak now!")
+                    
+                    audio = self.listener.listen(
+                        source,
+                        timeout=duration,
+                        phrase_time_limit=phrase_time_limit,
+                        token=token
+                    )
+                finally:
+                    source.stream = stream
+            if not audio.frame_data:
+                # The stream ended before anything was read
+                logger.warning("Microphone stream ended without audio")
+                return None
+            return audio
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            if token is not None:
+                # A wait cut short by the deadline is reported as such
+                token.raise_if_cancelled()
+            logger.error("Error capturing audio: %s", e)
+            return None
+
+    def _recording(self, source: sr.AudioSource) -> _RecordingStream:
+        # One wrapper per device stream, so a stream kept open between
+        # calls keeps its identity and the listener keeps its leftovers
+        if self._recording_stream is None or self._recording_stream.stream is not source.stream:
+            self._recording_stream = _RecordingStream(
+                source.stream, self.recorder, source.SAMPLE_RATE, source.SAMPLE_WIDTH
+            )
+        return self._recording_stream
+
+    def get_audio_cancellable(self, token: Optional[CancellationToken]) -> Optional[sr.AudioData]:
+        # Checked between stream reads, so the device is closed on cancel
+        # instead of being left open on an abandoned worker thread
+        return self.get_audio(token=token)
+
+
+class BufferedMicrophoneSource(MicrophoneSource):
+    """Microphone source that keeps the device open and buffers recent audio
+
+    A background thread continuously fills a fixed-size ring buffer, so
+    utterances can be cut out with pre-roll (audio before the detected
+    speech onset) and post-roll, and recent audio can be re-recognized
+    without capturing a new utterance.
+    """
+
+    def __init__(self,
+                 device_index: Optional[int] = None,
+                 buffer_seconds: float = 30.0,
+                 pre_roll: float = 0.5,
+                 post_roll: float = 0.3,
+                 microphone: Optional[sr.AudioSource] = None,
+                 recorder: Optional["SessionRecorder"] = None):
+        super().__init__(device_index, microphone, recorder)
+        self.buffer_seconds = buffer_seconds
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        # Most audio scanned per vectorized energy pass when catching up
+        self.block_seconds = DEFAULT_BLOCK_SECONDS
+        # Least new audio scanned per wake-up while keeping up with capture
+        self.scan_seconds = DEFAULT_SCAN_SECONDS
+        self.ring_buffer: Optional[PCMRingBuffer] = None
+        self.last_utterance: Optional[tuple] = None
+        self._cursor = 0
+        self._calibrated = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def sample_rate(self) -> int:
+        return self.microphone.SAMPLE_RATE
+
+    @property
+    def sample_width(self) -> int:
+        return self.microphone.SAMPLE_WIDTH
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def is_calibrated(self) -> bool:
+        return self._calibrated
+
+    def _seconds_to_bytes(self, seconds: float) -> int:
+        return int(seconds * self.sample_rate) * self.sample_width
+
+    def start(self):
+        """Open the device and start filling the ring buffer"""
+        with self._lock:
+            if self._running:
+                return
+            if self._thread is not None:
+                # Capture thread died; release the device before reopening
+                self._release_device()
+            self.microphone.__enter__()
+            if self.ring_buffer is None:
+                self.ring_buffer = PCMRingBuffer(
+                    self._seconds_to_bytes(self.buffer_seconds),
+                    frame_width=self.sample_width
                 )
-                return audio
+            else:
+                self.ring_buffer.reopen()
+            self._cursor = self.ring_buffer.written
+            self._running = True
+            self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop capturing and release the device; buffered audio is kept"""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._running = False
+            self._release_device()
+
+    def _release_device(self):
+        self._thread.join()
+        self._thread = None
+        self.microphone.__exit__(None, None, None)
+
+    def _capture_loop(self):
+        # Read a scan's worth per wake-up; the device buffers in between
+        frames_per_read = self.microphone.CHUNK * self._scan_chunks()
+        try:
+            while self._running:
+                data = self.microphone.stream.read(frames_per_read)
+                if not data:
+                    # End of a finite stream such as a replayed session
+                    self._running = False
+                    break
+                if self.recorder is not None:
+                    self.recorder.write(data, self.sample_rate, self.sample_width)
+                self.ring_buffer.write(data)
+        except Exception as e:
+            logger.error("Error capturing audio: %s", e)
+            self._running = False
+        finally:
+            self.ring_buffer.close()
+
+    def _wait_for(self, end: int, token: Optional[CancellationToken] = None) -> bool:
+        """Wait until ``end`` has been captured; False if capture stopped first"""
+        if token is None:
+            return self.ring_buffer.wait_for(end)
+        token.raise_if_cancelled()
+        while not self.ring_buffer.wait_for(end, timeout=token.slice()):
+            if self.ring_buffer.closed:
+                return False
+            token.raise_if_cancelled()
+        return True
+
+    def _read_chunk(self, position: int,
+                    token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        """Read one chunk at ``position``, waiting for it to be captured"""
+        end = position + self.microphone.CHUNK * self.sample_width
+        if not self._wait_for(end, token):
+            return None
+        return self.ring_buffer.read(position, end)
+
+    def _read_chunks(self, position: int, max_chunks: int,
+                     token: Optional[CancellationToken] = None,
+                     min_chunks: int = 1) -> Optional[bytes]:
+        """Read up to ``max_chunks`` whole chunks captured at ``position``
+
+        Waits until ``min_chunks`` are captured, then takes everything
+        available, so a consumer that has fallen behind catches up a block
+        at a time. If capture stops first, returns what was captured, or
+        None if not even one chunk was.
+        """
+        chunk_bytes = self.microphone.CHUNK * self.sample_width
+        wanted = min(min_chunks, max_chunks)
+        if not self._wait_for(position + wanted * chunk_bytes, token):
+            if self.ring_buffer.written - position < chunk_bytes:
+                return None
+        available = (self.ring_buffer.written - position) // chunk_bytes
+        return self.ring_buffer.read(position, position + min(available, max_chunks) * chunk_bytes)
+
+    def _block_chunks(self) -> int:
+        return max(1, int(self.block_seconds * self.sample_rate / self.microphone.CHUNK))
+
+    def _scan_chunks(self) -> int:
+        return max(1, int(self.scan_seconds * self.sample_rate / self.microphone.CHUNK))
+
+    def iter_chunks(self, timeout: Optional[float] = None,
+                    token: Optional[CancellationToken] = None):
+        """Yield newly captured chunks as they arrive
+
+        Stops after ``timeout`` seconds of audio or when capture stops.
+        Consumed audio is skipped by the next ``listen`` call.
+        """
+        self.start()
+        chunk_bytes = self.microphone.CHUNK * self.sample_width
+        seconds_per_chunk = self.microphone.CHUNK / self.sample_rate
+        position = max(self._cursor, self.ring_buffer.written)
+        elapsed = 0.0
+        while timeout is None or elapsed < timeout:
+            chunk = self._read_chunk(position, token)
+            if chunk is None:
+                return
+            position += chunk_bytes
+            elapsed += seconds_per_chunk
+            self._cursor = position
+            yield chunk
+
+    def adjust_for_ambient_noise(self, duration: float = 1.0,
+                                 token: Optional[CancellationToken] = None):
+        """Calibrate the energy threshold from the next ``duration`` seconds"""
+        self.start()
+        recognizer = self.recognizer
+        chunk_bytes = self.microphone.CHUNK * self.sample_width
+        seconds_per_chunk = self.microphone.CHUNK / self.sample_rate
+        damping = recognizer.dynamic_energy_adjustment_damping ** seconds_per_chunk
+        position = self.ring_buffer.written
+        remaining = int(math.ceil(duration / seconds_per_chunk - 1e-9))
+        while remaining > 0:
+            block = self._read_chunks(position, min(remaining, self._block_chunks()), token)
+            if block is None:
+                break
+            energies = chunk_energies(block, self.sample_width, chunk_bytes)
+            recognizer.energy_threshold = float(dynamic_thresholds(
+                energies, recognizer.energy_threshold, damping, recognizer.dynamic_energy_ratio
+            )[-1])
+            position += len(block)
+            remaining -= len(energies)
+        self._cursor = position
+        self._calibrated = True
+
+    def listen(self,
+               timeout: Optional[float] = None,
+               phrase_time_limit: Optional[float] = None,
+               on_frames: Optional[Callable[[bytes], None]] = None,
+               token: Optional[CancellationToken] = None
+               ) -> Optional[sr.AudioData]:
+        """Wait for the next phrase in the buffered stream
+
+        Mirrors ``Recognizer.listen``: raises ``sr.WaitTimeoutError`` if no
+        speech starts within ``timeout`` seconds and returns ``None`` if
+        capture stops before a phrase completes. If ``on_frames`` is given it
+        receives the phrase audio incrementally, starting with the pre-roll,
+        once the phrase is longer than ``phrase_threshold``. Raises
+        ``RequestCancelled`` as soon as ``token`` is cancelled or expires.
+        """
+        self.start()
+        recognizer = self.recognizer
+        width = self.sample_width
+        chunk_bytes = self.microphone.CHUNK * width
+        seconds_per_chunk = self.microphone.CHUNK / self.sample_rate
+        pause_chunks = int(recognizer.pause_threshold / seconds_per_chunk) + 1
+        phrase_bytes = self._seconds_to_bytes(recognizer.phrase_threshold)
+        limit_bytes = (self._seconds_to_bytes(phrase_time_limit)
+                       if phrase_time_limit else None)
+        damping = (recognizer.dynamic_energy_adjustment_damping ** seconds_per_chunk
+                   if recognizer.dynamic_energy_threshold else None)
+        pre_roll_bytes = self._seconds_to_bytes(self.pre_roll)
+        block_chunks = self._block_chunks()
+        scan_chunks = self._scan_chunks()
+        # Chunks that may be scanned before the wait times out
+        wait_limit = (int(math.floor(timeout / seconds_per_chunk + 1e-9))
+                      if timeout else None)
+
+        # Don't scan stale audio from before this call beyond the pre-roll
+        # window; the last capture read arrived at once, so it all counts
+        fresh = self._seconds_to_bytes(max(self.pre_roll, self.scan_seconds))
+        position = max(self._cursor, self.ring_buffer.written - fresh)
+        position -= (position - self.ring_buffer.oldest) % chunk_bytes
+        # Pre-roll never reaches back into audio already consumed by a
+        # previous phrase or wake word
+        scan_start = position
+        waited = 0
+
+        while True:
+            # Wait for speech onset, scanning whole blocks of captured chunks
+            while True:
+                if wait_limit is not None and waited >= wait_limit:
+                    if self._read_chunks(position, 1, token) is None:
+                        return None
+                    self._cursor = position + chunk_bytes
+                    raise sr.WaitTimeoutError(
+                        "listening timed out while waiting for phrase to start"
+                    )
+                max_chunks = block_chunks
+                if wait_limit is not None:
+                    max_chunks = min(max_chunks, wait_limit - waited)
+                block = self._read_chunks(position, max_chunks, token, scan_chunks)
+                if block is None:
+                    return None
+                energies = chunk_energies(block, width, chunk_bytes)
+                onset, recognizer.energy_threshold = find_onset(
+                    energies, recognizer.energy_threshold, damping,
+                    recognizer.dynamic_energy_ratio
+                )
+                used = len(energies) if onset < 0 else onset + 1
+                position += used * chunk_bytes
+                waited += used
+                if onset >= 0:
+                    break
+
+            speech_start = position - chunk_bytes
+            voice_end = position
+            pause_count = 0
+            fed = None
+            ended = False
+
+            # Collect the phrase until enough trailing silence
+            while pause_count <= pause_chunks:
+                max_chunks = block_chunks
+                if limit_bytes:
+                    left = limit_bytes - (position - speech_start)
+                    if left <= 0:
+                        break
+                    max_chunks = min(max_chunks, -(-left // chunk_bytes))
+                block = self._read_chunks(position, max_chunks, token, scan_chunks)
+                if block is None:
+                    ended = True
+                    break
+                energies = chunk_energies(block, width, chunk_bytes)
+                runs = pause_runs(energies, recognizer.energy_threshold, pause_count)
+                stops = np.flatnonzero(runs > pause_chunks)
+                used = int(stops[0]) + 1 if len(stops) else len(energies)
+                voiced = np.flatnonzero(runs[:used] == 0)
+                if len(voiced):
+                    voice_end = position + (int(voiced[-1]) + 1) * chunk_bytes
+                pause_count = int(runs[used - 1])
+                position += used * chunk_bytes
+                if on_frames is None:
+                    continue
+                if fed is None and voice_end - speech_start >= phrase_bytes:
+                    fed = max(speech_start - pre_roll_bytes, scan_start,
+                              self.ring_buffer.oldest)
+                if fed is not None:
+                    on_frames(self.ring_buffer.read(fed, position))
+                    fed = position
+
+            if voice_end - speech_start >= phrase_bytes or ended:
+                break
+
+        self._cursor = position
+        end = voice_end + self._seconds_to_bytes(self.post_roll)
+        post_roll_wait = self.post_roll + 1.0
+        if token is not None and token.remaining() is not None:
+            post_roll_wait = min(post_roll_wait, token.remaining())
+        self.ring_buffer.wait_for(end, timeout=post_roll_wait)
+        end = min(end, self.ring_buffer.written)
+        start = max(speech_start - pre_roll_bytes, scan_start,
+                    self.ring_buffer.oldest)
+        if on_frames is not None:
+            if fed is None:
+                fed = start
+            if end > fed:
+                on_frames(self.ring_buffer.read(fed, end))
+        self.last_utterance = (start, end)
+        return self._extract(start, end)
+
+    def _extract(self, start: int, end: int) -> sr.AudioData:
+        frame_data = self.ring_buffer.read(start, end)
+        return sr.AudioData(frame_data, self.sample_rate, self.sample_width)
+
+    def get_audio(self, duration: Optional[float] = None,
+                  phrase_time_limit: Optional[float] = None,
+                  token: Optional[CancellationToken] = None) -> Optional[sr.AudioData]:
+        """Capture the next phrase, keeping the device open afterwards"""
+        try:
+            if not self._calibrated:
+                self.adjust_for_ambient_noise(duration=1, token=token)
+            return self.listen(
+                timeout=duration, phrase_time_limit=phrase_time_limit, token=token
+            )
+        except RequestCancelled:
+            raise
         except Exception as e:
-            logging.error(f"Error capturing audio: {e}")
+            logger.error("Error capturing audio: %s", e)
+            return None
+
+    def get_audio_cancellable(self, token: Optional[CancellationToken]) -> Optional[sr.AudioData]:
+        # Checked between chunks; no worker thread needed
+        return self.get_audio(token=token)
+
+    def get_last_utterance(self) -> Optional[sr.AudioData]:
+        """Re-extract the most recent phrase, e.g. to retry recognition"""
+        if self.last_utterance is None:
+            return None
+        start, end = self.last_utterance
+        if start < self.ring_buffer.oldest:
+            return None
+        return self._extract(start, end)
+
+    def replay_last(self, seconds: float) -> Optional[sr.AudioData]:
+        """Return the most recent ``seconds`` of captured audio"""
+        if self.ring_buffer is None:
             return None
+        frame_data = self.ring_buffer.read_last(self._seconds_to_bytes(seconds))
+        return sr.AudioData(frame_data, self.sample_rate, self.sample_width)
 
 
 class FileSource(AudioSource):
@@ -47,10 +500,17 @@ class FileSource(AudioSource):
     
     def get_audio(self) -> Optional[sr.AudioData]:
 
+        if native_flac_available() and is_flac(self.file_path):
+            # Skip the flac subprocess and AIFF round-trip of sr.AudioFile
+            try:
+                with stage("file_source.decode_flac"):
+                    return decode_flac(self.file_path)
+            except Exception as e:
+                logger.warning("Native FLAC decoding failed, using the flac binary: %s", e)
         try:
-            with sr.AudioFile(self.file_path) as source:
+            with stage("file_source.get_audio"), sr.AudioFile(self.file_path) as source:
                 audio = self.recognizer.record(source)
                 return audio
         except Exception as e:
-            logging.error(f"Error loading audio file: {e}")
+            logger.error("Error loading audio file: %s", e)
             return None
\ No newline at end of file
@@ -0,0 +1,151 @@
+from typing import Callable, List, Optional, TypeVar
+import threading
+import time
+
+
+T = TypeVar("T")
+
+# Longest a cancellable wait sleeps before re-checking its token
+POLL_INTERVAL = 0.1
+
+
+class RequestCancelled(Exception):
+    """The request was cancelled by its caller"""
+
+
+class DeadlineExceeded(RequestCancelled):
+    """The request ran past its deadline"""
+
+
+class CancellationToken:
+    """Deadline and cancellation flag shared by every stage of one request
+
+    Blocking stages wait through ``wait`` or ``remaining`` and call
+    ``raise_if_cancelled`` between steps. ``cancel`` may be called from
+    any thread. A child token is cancelled with its parent and never
+    outlives the parent's deadline.
+    """
+
+    def __init__(self,
+                 timeout: Optional[float] = None,
+                 parent: Optional["CancellationToken"] = None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if parent is not None and parent.deadline is not None:
+            deadline = parent.deadline if deadline is None else min(deadline, parent.deadline)
+        self.deadline = deadline
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._parent = parent
+        if parent is not None:
+            parent.add_callback(self._cancel_from_parent)
+
+    def _cancel_from_parent(self):
+        self.cancel(self._parent.reason)
+
+    def detach(self):
+        """Stop following the parent, once this token's request is done"""
+        if self._parent is not None:
+            self._parent.remove_callback(self._cancel_from_parent)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: Optional[str] = None):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason or "Request cancelled"
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]):
+        """Call ``callback`` on cancellation (immediately if already cancelled)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise RequestCancelled(self.reason)
+        if self.expired:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep up to ``timeout`` seconds; True if cancelled or expired"""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return self._event.wait(timeout) or self.expired
+
+    def slice(self, timeout: Optional[float] = None) -> float:
+        """Timeout for one step of a wait that must notice cancellation"""
+        limit = POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL)
+        remaining = self.remaining()
+        return limit if remaining is None else min(limit, remaining)
+
+
+def run_cancellable(token: Optional[CancellationToken],
+                    func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call that cannot itself be interrupted
+
+    Without a token the call runs inline. Otherwise it runs on a daemon
+    worker thread, and the caller returns as soon as the token is
+    cancelled or expires, abandoning the worker. The worker's eventual
+    result is discarded, so only use this for calls without side effects
+    the caller depends on.
+    """
+    if token is None:
+        return func(*args, **kwargs)
+    token.raise_if_cancelled()
+
+    outcome = {}
+    done = threading.Event()
+
+    def target():
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    worker = threading.Thread(
+        target=target, name=f"cancellable-{getattr(func, '__name__', 'call')}", daemon=True
+    )
+    token.add_callback(done.set)
+    try:
+        worker.start()
+        done.wait(token.remaining())
+    finally:
+        token.remove_callback(done.set)
+
+    if "error" in outcome:
+        raise outcome["error"]
+    if "result" in outcome:
+        return outcome["result"]
+    token.raise_if_cancelled()
+    # Woken without an outcome and without cancellation: the deadline
+    # passed within the clock's resolution
+    raise DeadlineExceeded("Request deadline exceeded")
@@ -0,0 +1,264 @@
+import speech_recognition as sr
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import logging
+import threading
+
+from .audio_sources import AudioSource, BufferedMicrophoneSource
+from .cancellation import CancellationToken, RequestCancelled
+from .constants import LanguageCode
+from .main import VoiceRecognitionSystem
+from .models import RecognitionResult
+
+
+logger = logging.getLogger(__name__)
+
+
+class _SourceChannel:
+    """One capture input with its own bounded queue of captured phrases"""
+
+    def __init__(self,
+                 name: str,
+                 source: AudioSource,
+                 language: Optional[LanguageCode],
+                 queue_size: int):
+        self.name = name
+        self.source = source
+        self.language = language
+        self.queue: deque = deque(maxlen=queue_size)
+        self.thread: Optional[threading.Thread] = None
+        self.capturing = False
+        self.captured = 0
+        self.dropped = 0
+        self.recognized = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    def get_stats(self) -> Dict:
+        return {
+            "capturing": self.capturing,
+            "queued": len(self.queue),
+            "in_flight": self.in_flight,
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "recognized": self.recognized,
+            "failed": self.failed,
+        }
+
+
+class CaptureManager:
+    """Capture from many inputs at once into one shared recognition pool
+
+    Every source gets its own capture thread, which only listens and
+    queues phrases, so a slow recognition never makes another input miss
+    audio. Each source's queue holds at most ``queue_size`` phrases; when
+    recognition falls behind the oldest phrase of that source is dropped
+    and counted, never another source's. Worker threads take phrases from
+    the source queues in round-robin order, so a noisy input gets no more
+    than its share of the pool while others are waiting. Results are
+    recorded in the system's history with ``source`` set to the input's
+    name.
+    """
+
+    def __init__(self,
+                 system: VoiceRecognitionSystem,
+                 workers: int = 4,
+                 queue_size: int = 8,
+                 on_result: Optional[Callable[[RecognitionResult], None]] = None,
+                 max_failures: int = 3,
+                 retry_delay: float = 1.0):
+        self.system = system
+        self.workers = workers
+        self.queue_size = queue_size
+        self.on_result = on_result
+        # Consecutive empty captures before a source is considered gone
+        self.max_failures = max_failures
+        self.retry_delay = retry_delay
+        self._channels: Dict[str, _SourceChannel] = {}
+        self._order: List[_SourceChannel] = []
+        self._next = 0
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._stop_token = CancellationToken()
+        self._abort_token = CancellationToken()
+        self._started = False
+
+    def add_source(self,
+                   name: str,
+                   source: AudioSource,
+                   language: Optional[LanguageCode] = None) -> str:
+        """Register an input; sources added after ``start`` begin at once"""
+        with self._condition:
+            if name in self._channels:
+                raise ValueError(f"Source {name} is already registered")
+            channel = _SourceChannel(name, source, language, self.queue_size)
+            self._channels[name] = channel
+            self._order.append(channel)
+            if self._started:
+                self._start_capture(channel)
+        return name
+
+    def add_device(self,
+                   device_index: int,
+                   name: Optional[str] = None,
+                   language: Optional[LanguageCode] = None,
+                   **source_options) -> str:
+        """Register a microphone by index, as listed by ``list_microphones``"""
+        source = BufferedMicrophoneSource(device_index=device_index, **source_options)
+        return self.add_source(name or f"device-{device_index}", source, language)
+
+    @property
+    def sources(self) -> List[str]:
+        return [channel.name for channel in self._order]
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return sum(len(channel.queue) for channel in self._order)
+
+    def start(self):
+        with self._condition:
+            if self._started:
+                return
+            self._started = True
+            for channel in self._order:
+                self._start_capture(channel)
+        for index in range(self.workers):
+            worker = threading.Thread(target=self._worker_loop,
+                                      name=f"capture-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _start_capture(self, channel: _SourceChannel):
+        channel.capturing = True
+        channel.thread = threading.Thread(target=self._capture_loop, args=(channel,),
+                                          name=f"capture-{channel.name}", daemon=True)
+        channel.thread.start()
+
+    def _capture_loop(self, channel: _SourceChannel):
+        failures = 0
+        try:
+            while not self._stop_token.cancelled:
+                try:
+                    audio = channel.source.get_audio_cancellable(self._stop_token)
+                except RequestCancelled:
+                    break
+                except Exception as e:
+                    logger.warning("Capture from %s failed: %s", channel.name, e)
+                    audio = None
+                if audio is None:
+                    failures += 1
+                    if failures >= self.max_failures:
+                        logger.warning("Source %s stopped delivering audio", channel.name)
+                        break
+                    self._stop_token.wait(self.retry_delay)
+                    continue
+                failures = 0
+                self._enqueue(channel, audio)
+        finally:
+            with self._condition:
+                channel.capturing = False
+                self._condition.notify_all()
+            stop = getattr(channel.source, "stop", None)
+            if stop is not None:
+                stop()
+
+    def _enqueue(self, channel: _SourceChannel, audio: sr.AudioData):
+        with self._condition:
+            if self._abort_token.cancelled:
+                channel.dropped += 1
+                return
+            if len(channel.queue) == channel.queue.maxlen:
+                # The deque discards its oldest phrase on append
+                channel.dropped += 1
+                logger.debug("Recognition behind on %s; dropped its oldest phrase",
+                             channel.name)
+            channel.queue.append(audio)
+            channel.captured += 1
+            self._condition.notify()
+
+    def _take(self):
+        """Next phrase in round-robin order over sources; None when finished"""
+        with self._condition:
+            while True:
+                if self._abort_token.cancelled:
+                    return None
+                count = len(self._order)
+                for step in range(count):
+                    channel = self._order[(self._next + step) % count]
+                    if channel.queue:
+                        self._next = (self._next + step + 1) % count
+                        channel.in_flight += 1
+                        return channel, channel.queue.popleft()
+                if self._stop_token.cancelled and not any(
+                        channel.capturing for channel in self._order):
+                    return None
+                self._condition.wait()
+
+    def _worker_loop(self):
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            channel, audio = item
+            try:
+                result = self.system.recognize_audio(
+                    audio, channel.language, token=self._abort_token, source=channel.name
+                )
+            except Exception as e:
+                # One bad phrase or callback must not take a worker down
+                logger.error("Recognition for %s failed: %s", channel.name, e)
+                result = None
+            with self._condition:
+                channel.in_flight -= 1
+                if result is not None and result.success:
+                    channel.recognized += 1
+                else:
+                    channel.failed += 1
+                self._condition.notify_all()
+            if result is not None and self.on_result is not None:
+                try:
+                    self.on_result(result)
+                except Exception as e:
+                    logger.error("Result callback failed: %s", e)
+
+    def _idle(self) -> bool:
+        return not any(channel.capturing or channel.queue or channel.in_flight
+                       for channel in self._order)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every source has finished and its phrases are recognized
+
+        Returns False if ``timeout`` passed first. Workers keep running, so
+        sources can still be added afterwards.
+        """
+        with self._condition:
+            return self._condition.wait_for(self._idle, timeout)
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = None):
+        """Stop capturing; with ``drain`` recognize what is already queued
+
+        Without ``drain`` queued phrases are discarded and recognitions in
+        progress are cancelled.
+        """
+        self._stop_token.cancel("Capture stopped")
+        with self._condition:
+            if not drain:
+                self._abort_token.cancel("Capture stopped")
+                for channel in self._order:
+                    channel.dropped += len(channel.queue)
+                    channel.queue.clear()
+            self._condition.notify_all()
+        for channel in self._order:
+            if channel.thread is not None:
+                channel.thread.join(timeout)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def get_stats(self) -> Dict:
+        with self._condition:
+            return {
+                "workers": self.workers,
+                "queue_depth": sum(len(channel.queue) for channel in self._order),
+                "sources": {channel.name: channel.get_stats() for channel in self._order},
+            }
@@ -0,0 +1,421 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import List, Optional
+
+from .capture_manager import CaptureManager
+from .concurrency import LimitedRecognitionEngine
+from .constants import LanguageCode
+from .distributed_batch import BatchWorker, WorkQueue, merge_results
+from .engine_router import EngineRouter
+from .load_test import HttpRecognitionEngine, LoadGenerator, MockRecognitionServer, SourcePool
+from .log_pipeline import configure_logging, shutdown_logging
+from .main import VoiceRecognitionSystem
+from .profiling import DEFAULT_PROFILE_DIR, start_profiling, stop_profiling
+from .recognition_engines import (
+    GoogleRecognitionEngine,
+    RecognitionEngine,
+    SphinxRecognitionEngine,
+)
+from .result_sinks import JsonlFileSink, ResultSink, SQLiteSink, WebhookSink
+
+
+ENGINES = {
+    "google": GoogleRecognitionEngine,
+    "sphinx": SphinxRecognitionEngine,
+    # Offline Sphinx where a model is installed, Google for everything else
+    "router": lambda: EngineRouter.with_installed_models(
+        fallback=GoogleRecognitionEngine()
+    ),
+}
+
+
+def create_engine(name: str, adaptive: bool = False) -> RecognitionEngine:
+    """Build a recognition engine from its command-line name
+
+    With ``adaptive`` the remote backend is wrapped in its own
+    ``LimitedRecognitionEngine``.
+    """
+    engine = ENGINES[name]()
+    if not adaptive:
+        return engine
+    if isinstance(engine, EngineRouter):
+        # Offline routes are bounded by their model locks already
+        if engine.fallback is not None:
+            engine.fallback = LimitedRecognitionEngine(engine.fallback)
+        return engine
+    return LimitedRecognitionEngine(engine)
+
+
+SINKS = {
+    "jsonl": JsonlFileSink,
+    "sqlite": SQLiteSink,
+    "webhook": WebhookSink,
+}
+
+
+def create_sink(spec: str) -> ResultSink:
+    """Build a result sink from ``KIND:TARGET``, e.g. ``sqlite:results.db``"""
+    kind, _, target = spec.partition(":")
+    if kind not in SINKS or not target:
+        raise argparse.ArgumentTypeError(
+            f"expected KIND:TARGET with KIND one of {', '.join(sorted(SINKS))}"
+        )
+    return SINKS[kind](target)
+
+
+def _add_sink_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--sink",
+        dest="sinks",
+        type=create_sink,
+        action="append",
+        default=[],
+        metavar="KIND:TARGET",
+        help="Also deliver results in batches to jsonl:PATH, sqlite:PATH or "
+             "webhook:URL (repeatable)"
+    )
+
+
+def _add_language_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--language",
+        default=LanguageCode.ENGLISH_US.value,
+        choices=VoiceRecognitionSystem.list_available_languages(),
+        help="Language code to recognize (default: en-US)"
+    )
+
+
+def _add_logging_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Log level (default: WARNING)"
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="Emit structured JSON log records"
+    )
+    parser.add_argument("--log-file", help="Write logs to this file instead of stderr")
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser):
+    """Arguments for every subcommand that runs recognition"""
+    _add_language_argument(parser)
+    parser.add_argument(
+        "--engine",
+        default="google",
+        choices=sorted(ENGINES),
+        help="Recognition engine (default: google)"
+    )
+    parser.add_argument(
+        "--adaptive-concurrency",
+        action="store_true",
+        help="Limit concurrent engine requests, adapting the limit to latency and errors"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Abandon any recognition still running after SECONDS"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE_DIR,
+        metavar="DIR",
+        help=f"Profile the run and write reports to DIR (default: {DEFAULT_PROFILE_DIR})"
+    )
+    _add_logging_arguments(parser)
+
+
+def _transcribe(args) -> int:
+    system = VoiceRecognitionSystem(
+        create_engine(args.engine, args.adaptive_concurrency), request_timeout=args.timeout
+    )
+    for sink in args.sinks:
+        system.add_sink(sink)
+    language = LanguageCode(args.language)
+    failures = 0
+    try:
+        for file_path in args.files:
+            result = system.recognize_from_file(file_path, language)
+            if result.success:
+                print(f"{file_path}\t{result.text}")
+            else:
+                failures += 1
+                print(f"{file_path}\tERROR: {result.error_message}", file=sys.stderr)
+    finally:
+        system.close_sinks()
+    if args.output:
+        system.export_history(args.output)
+    return 1 if failures else 0
+
+
+def _capture(args) -> int:
+    system = VoiceRecognitionSystem(
+        create_engine(args.engine, args.adaptive_concurrency), request_timeout=args.timeout
+    )
+
+    def print_result(result):
+        if result.success:
+            print(f"{result.source}\t{result.text}", flush=True)
+        else:
+            print(f"{result.source}\tERROR: {result.error_message}", file=sys.stderr)
+
+    for sink in args.sinks:
+        system.add_sink(sink)
+    manager = CaptureManager(system, workers=args.workers, on_result=print_result)
+    for device_index in args.devices:
+        manager.add_device(device_index, language=LanguageCode(args.language))
+    manager.start()
+    try:
+        if args.duration:
+            time.sleep(args.duration)
+        else:
+            manager.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.stop()
+        system.close_sinks()
+    if args.output:
+        system.export_history(args.output)
+    return 0
+
+
+def _build_source_pool(args) -> SourcePool:
+    if args.source == "file":
+        if not args.files:
+            raise SystemExit("--source file requires --files")
+        return SourcePool.from_files(args.files, args.streams)
+    if args.source == "replay":
+        if not args.session:
+            raise SystemExit("--source replay requires --session")
+        return SourcePool.from_session(args.session, args.streams, args.replay_speed)
+    return SourcePool.synthetic(args.streams)
+
+
+def _loadtest(args) -> int:
+    sources = _build_source_pool(args)
+    server = None
+    if args.mock_server:
+        server = MockRecognitionServer(
+            latency=args.mock_latency, error_rate=args.mock_error_rate
+        )
+        server.start()
+        engine = HttpRecognitionEngine(server.url)
+        if args.adaptive_concurrency:
+            engine = LimitedRecognitionEngine(engine)
+    else:
+        engine = create_engine(args.engine, args.adaptive_concurrency)
+
+    try:
+        system = VoiceRecognitionSystem(engine, request_timeout=args.timeout)
+        generator = LoadGenerator(system, sources, LanguageCode(args.language))
+        if args.rate:
+            reports = generator.ramp(args.rate, args.duration)
+        else:
+            reports = [generator.run(args.duration, max_requests=args.requests)]
+    finally:
+        if server is not None:
+            server.stop()
+
+    for report in reports:
+        print(report.format())
+    if isinstance(engine, LimitedRecognitionEngine):
+        stats = engine.get_stats()
+        print(f"Adaptive concurrency limit settled at {stats['limit']} "
+              f"({stats['overloads']} decreases)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump([report.to_dict() for report in reports], f, indent=2)
+    return 0
+
+
+def _batch_enqueue(args) -> int:
+    added = WorkQueue(args.queue_dir).enqueue(args.files, args.language)
+    print(f"Queued {added} new items ({len(args.files) - added} already queued)")
+    return 0
+
+
+def _batch_work(args) -> int:
+    work_queue = WorkQueue(args.queue_dir, lease_ttl=args.lease_ttl)
+    system = VoiceRecognitionSystem(
+        create_engine(args.engine, args.adaptive_concurrency), request_timeout=args.timeout
+    )
+    worker = BatchWorker(work_queue, system, node_id=args.node_id,
+                         max_attempts=args.max_attempts)
+    processed = worker.run(max_items=args.max_items)
+    print(f"{worker.node_id}: processed {processed} items")
+    return 0
+
+
+def _batch_merge(args) -> int:
+    work_queue = WorkQueue(args.queue_dir)
+    merged = merge_results(work_queue, args.output)
+    pending = len(work_queue.pending())
+    print(f"Merged {merged} results into {args.output}"
+          + (f"; {pending} items still pending" if pending else ""))
+    return 1 if pending else 0
+
+
+def _batch_status(args) -> int:
+    status = WorkQueue(args.queue_dir, lease_ttl=args.lease_ttl).get_status()
+    print(f"{status['done']}/{status['items']} done, {status['leased']} leased")
+    for node in status["nodes"]:
+        if node["alive"]:
+            state = "alive"
+        else:
+            state = "stopped" if node.get("state") == "stopped" else "dead"
+        print(f"  {node['node']}: {state}, {node['processed']} processed, "
+              f"last heartbeat {node['age_s']:.0f}s ago")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Multilingual voice recognition tools"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    transcribe = subparsers.add_parser("transcribe", help="Transcribe audio files")
+    transcribe.add_argument("files", nargs="+", help="WAV, AIFF or FLAC files")
+    transcribe.add_argument("--output", help="Export results to this JSON file")
+    _add_sink_arguments(transcribe)
+    _add_common_arguments(transcribe)
+    transcribe.set_defaults(handler=_transcribe)
+
+    capture = subparsers.add_parser(
+        "capture", help="Recognize from several microphones at once"
+    )
+    capture.add_argument(
+        "--devices",
+        type=int,
+        nargs="+",
+        required=True,
+        metavar="INDEX",
+        help="Microphone device indexes to capture from"
+    )
+    capture.add_argument(
+        "--workers", type=int, default=4, help="Concurrent recognitions (default: 4)"
+    )
+    capture.add_argument(
+        "--duration", type=float, help="Stop after this many seconds (default: until Ctrl+C)"
+    )
+    capture.add_argument("--output", help="Export results to this JSON file")
+    _add_sink_arguments(capture)
+    _add_common_arguments(capture)
+    capture.set_defaults(handler=_capture)
+
+    loadtest = subparsers.add_parser(
+        "loadtest", help="Drive concurrent recognitions and report latency percentiles"
+    )
+    loadtest.add_argument(
+        "--source",
+        default="synthetic",
+        choices=["file", "replay", "synthetic"],
+        help="Where request audio comes from (default: synthetic tone)"
+    )
+    loadtest.add_argument("--files", nargs="+", help="Audio files for --source file")
+    loadtest.add_argument("--session", help="Recorded session for --source replay")
+    loadtest.add_argument(
+        "--replay-speed",
+        type=float,
+        help="Replay pacing, e.g. 1.0 for real time (default: unpaced)"
+    )
+    loadtest.add_argument(
+        "--streams", type=int, default=4, help="Concurrent sessions (default: 4)"
+    )
+    loadtest.add_argument(
+        "--rate",
+        type=float,
+        nargs="+",
+        metavar="RPS",
+        help="Open-loop request rates to step through until saturation "
+             "(default: closed loop, one request per stream at a time)"
+    )
+    loadtest.add_argument(
+        "--duration", type=float, default=30.0, help="Seconds per step (default: 30)"
+    )
+    loadtest.add_argument("--requests", type=int, help="Stop a closed-loop run after N requests")
+    loadtest.add_argument(
+        "--mock-server",
+        action="store_true",
+        help="Recognize against a local mock service instead of --engine"
+    )
+    loadtest.add_argument(
+        "--mock-latency", type=float, default=0.2, help="Mock service latency in seconds"
+    )
+    loadtest.add_argument(
+        "--mock-error-rate", type=float, default=0.0, help="Fraction of mock requests that fail"
+    )
+    loadtest.add_argument("--output", help="Write the reports to this JSON file")
+    _add_common_arguments(loadtest)
+    loadtest.set_defaults(handler=_loadtest)
+
+    batch = subparsers.add_parser(
+        "batch", help="Transcribe a backlog on several nodes through a shared directory"
+    )
+    batch_commands = batch.add_subparsers(dest="batch_command", required=True)
+
+    enqueue = batch_commands.add_parser("enqueue", help="Add files to the work queue")
+    enqueue.add_argument("queue_dir", help="Shared work-queue directory")
+    enqueue.add_argument("files", nargs="+", help="WAV, AIFF or FLAC files")
+    _add_language_argument(enqueue)
+    _add_logging_arguments(enqueue)
+    enqueue.set_defaults(handler=_batch_enqueue)
+
+    work = batch_commands.add_parser("work", help="Process queued items until none are left")
+    work.add_argument("queue_dir", help="Shared work-queue directory")
+    work.add_argument("--node-id", help="Name of this node (default: <host>-<pid>)")
+    work.add_argument("--max-items", type=int, help="Exit after processing N items")
+    work.add_argument("--max-attempts", type=int, default=3,
+                      help="Tries per item on connection errors and timeouts (default: 3)")
+    _add_common_arguments(work)
+    work.set_defaults(handler=_batch_work)
+
+    merge = batch_commands.add_parser("merge", help="Merge per-node result shards")
+    merge.add_argument("queue_dir", help="Shared work-queue directory")
+    merge.add_argument("--output", required=True, help="Merged JSON results file")
+    _add_logging_arguments(merge)
+    merge.set_defaults(handler=_batch_merge)
+
+    status = batch_commands.add_parser("status", help="Show progress and node liveness")
+    status.add_argument("queue_dir", help="Shared work-queue directory")
+    _add_logging_arguments(status)
+    status.set_defaults(handler=_batch_status)
+
+    for command in (work, status):
+        command.add_argument(
+            "--lease-ttl",
+            type=float,
+            default=60.0,
+            help="Seconds without a heartbeat before a node's work is re-claimed "
+                 "(default: 60)"
+        )
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(
+        level=getattr(logging, args.log_level),
+        json_format=args.log_json,
+        file_path=args.log_file
+    )
+    profile = getattr(args, "profile", None)
+    if profile:
+        start_profiling(profile)
+    try:
+        return args.handler(args)
+    finally:
+        if profile:
+            stop_profiling()
+        shutdown_logging()
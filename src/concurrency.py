@@ -0,0 +1,243 @@
+import speech_recognition as sr
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+from .cancellation import (
+    CancellationToken,
+    DeadlineExceeded,
+    RequestCancelled,
+    run_cancellable,
+)
+from .recognition_engines import RecognitionEngine
+
+
+logger = logging.getLogger(__name__)
+
+# Fewest replies at a new limit before its latency is judged
+MIN_SAMPLES = 10
+
+
+class AdaptiveLimiter:
+    """Limit on concurrent requests that adapts to the backend's response
+
+    Additive increase, multiplicative decrease: every request that
+    completes normally while the limit is in use raises the limit by
+    ``1 / limit``, so about one per round of requests. A failure that
+    signals overload, or a smoothed latency above ``tolerance`` times the
+    no-load latency, multiplies it by ``backoff``. After a cut only
+    requests started under the new limit are judged, and only once a
+    round of them has completed, so one burst counts once. The no-load
+    latency is the lowest smoothed latency seen, allowed to double over
+    ``window`` replies so it follows a backend that gets slower for good.
+    Callers over the limit wait in ``acquire``.
+    """
+
+    def __init__(self,
+                 initial_limit: int = 4,
+                 min_limit: int = 1,
+                 max_limit: int = 64,
+                 backoff: float = 0.7,
+                 tolerance: float = 2.0,
+                 window: int = 1000,
+                 smoothing: float = 0.05):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._drift = 2.0 ** (1.0 / window)
+        self._no_load: Optional[float] = None
+        self._fresh = 0
+        self._smoothed: Optional[float] = None
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._overloads = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Callers waiting for a slot"""
+        return self._waiting
+
+    def acquire(self,
+                token: Optional[CancellationToken] = None,
+                timeout: Optional[float] = None) -> bool:
+        """Wait for a slot; False if ``timeout`` passed first
+
+        Raises ``RequestCancelled`` as soon as ``token`` is cancelled or
+        expires while waiting.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.limit:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    if token is not None:
+                        token.raise_if_cancelled()
+                        remaining = token.slice(remaining)
+                    self._condition.wait(remaining)
+                self._in_flight += 1
+                return True
+            finally:
+                self._waiting -= 1
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """Free a slot and feed back how the request went
+
+        ``latency`` is None for requests whose duration says nothing about
+        the backend's load, e.g. failed or abandoned ones.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if latency is not None or overloaded:
+                self._update(latency, overloaded)
+            self._condition.notify_all()
+
+    def _update(self, latency: Optional[float], overloaded: bool):
+        self._completed += 1
+        now = time.monotonic()
+        if latency is not None:
+            if now - latency < self._last_decrease:
+                # Started under the previous limit; says nothing about this one
+                return
+            self._fresh += 1
+            # Plain mean while warming up, so one outlier can't seed the average
+            weight = max(self.smoothing, 1.0 / self._fresh)
+            self._smoothed = (latency if self._smoothed is None else
+                              self._smoothed + weight * (latency - self._smoothed))
+            # Judge latency only once a full round has run at this limit
+            if self._fresh >= max(MIN_SAMPLES, self.limit):
+                self._no_load = (self._smoothed if self._no_load is None else
+                                 min(self._smoothed, self._no_load * self._drift))
+                if self._smoothed > self.tolerance * self._no_load:
+                    overloaded = True
+
+        if overloaded:
+            # A burst of errors from requests in flight at a cut counts once
+            cooldown = self._smoothed or self._no_load or 0.0
+            if self._fresh or now - self._last_decrease >= cooldown:
+                self._overloads += 1
+                self._last_decrease = now
+                self._smoothed = None
+                self._fresh = 0
+                previous = self.limit
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                if self.limit != previous:
+                    logger.info("Concurrency limit lowered to %d", self.limit)
+        elif self._in_flight + 1 >= self.limit:
+            # Only grow while the limit is what holds requests back
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+    @contextmanager
+    def slot(self, token: Optional[CancellationToken] = None):
+        """Hold a slot for the duration of the block, timing it
+
+        ``ConnectionError`` inside the block counts as overload.
+        """
+        self.acquire(token)
+        started = time.perf_counter()
+        try:
+            yield
+        except ConnectionError:
+            self.release(None, overloaded=True)
+            raise
+        except BaseException:
+            self.release(None)
+            raise
+        self.release(time.perf_counter() - started)
+
+    def get_stats(self) -> Dict:
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "completed": self._completed,
+                "overloads": self._overloads,
+                "latency_s": self._smoothed,
+                "no_load_latency_s": self._no_load,
+            }
+
+
+class LimitedRecognitionEngine(RecognitionEngine):
+    """Engine wrapper that keeps in-flight requests within an ``AdaptiveLimiter``
+
+    Give every backend its own wrapper so each settles at its own limit.
+    ``ConnectionError`` (network failures, throttling) counts as overload;
+    ``ValueError`` for unintelligible audio is a normal reply. A request
+    abandoned by its caller keeps its slot until the engine call actually
+    returns, since the backend is still working on it.
+    """
+
+    def __init__(self, engine: RecognitionEngine, limiter: Optional[AdaptiveLimiter] = None):
+        self.engine = engine
+        self.limiter = limiter or AdaptiveLimiter()
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Tuple[str, Optional[float]]:
+        self.limiter.acquire()
+        return self._recognize_and_release(audio, language)
+
+    def _recognize_and_release(self,
+                               audio: sr.AudioData,
+                               language: str) -> Tuple[str, Optional[float]]:
+        started = time.perf_counter()
+        try:
+            result = self.engine.recognize(audio, language)
+        except ConnectionError:
+            # A throttled or failed reply's latency is no sign of load
+            self.limiter.release(None, overloaded=True)
+            raise
+        except ValueError:
+            self.limiter.release(time.perf_counter() - started)
+            raise
+        except BaseException:
+            self.limiter.release(None)
+            raise
+        self.limiter.release(time.perf_counter() - started)
+        return result
+
+    def recognize_cancellable(self,
+                              audio: sr.AudioData,
+                              language: str,
+                              token: Optional[CancellationToken]) -> Tuple[str, Optional[float]]:
+        if token is None:
+            return self.recognize(audio, language)
+        # Wait for a slot in the caller's thread so a cancelled request
+        # never reaches the backend
+        if not self.limiter.acquire(token, token.remaining()):
+            raise DeadlineExceeded("Request deadline exceeded")
+        # Whoever takes ``claim`` first owns the slot: the worker to run the
+        # request, or the caller to free it if the request never started
+        claim = threading.Lock()
+
+        def run() -> Tuple[str, Optional[float]]:
+            if not claim.acquire(blocking=False):
+                raise RequestCancelled(token.reason)
+            return self._recognize_and_release(audio, language)
+
+        try:
+            return run_cancellable(token, run)
+        except RequestCancelled:
+            if claim.acquire(blocking=False):
+                self.limiter.release(None)
+            raise
+
+    def get_stats(self) -> Dict:
+        return self.limiter.get_stats()
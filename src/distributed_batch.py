@@ -0,0 +1,430 @@
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+
+from .constants import LanguageCode
+from .main import VoiceRecognitionSystem
+
+
+logger = logging.getLogger(__name__)
+
+ITEMS_DIR = "items"
+LEASES_DIR = "leases"
+DONE_DIR = "done"
+NODES_DIR = "nodes"
+RESULTS_DIR = "results"
+
+
+def _write_json_atomic(path: str, payload: Dict):
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def _truncate_partial_line(path: str):
+    """Cut a torn last line, left by a crash mid-write, off a JSON lines file"""
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 65536)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            logger.warning("Truncating torn last line of %s", path)
+            f.truncate(position)
+
+
+def _create_exclusive(path: str, payload: Dict) -> bool:
+    """Create ``path`` only if it does not exist; atomic on POSIX and NFSv3+"""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    return True
+
+
+class WorkQueue:
+    """Work items, leases and results in a directory shared by all nodes
+
+    Layout::
+
+        items/<id>.json     one per file to transcribe, written by enqueue;
+                            rewritten with the attempt count after a
+                            retryable failure
+        leases/<id>.lease   created with O_EXCL by the node working on it;
+                            its mtime is refreshed by the node's heartbeat
+        done/<id>           created once the result is durably in a shard
+        nodes/<node>.json   last heartbeat of each node
+        results/<node>.jsonl  results written by each node
+
+    A lease whose mtime is older than ``lease_ttl`` belongs to a dead node
+    and may be taken over. Processing is at-least-once: a node stalled past
+    its lease can still finish an item someone else re-claimed, so
+    ``merge_results`` keeps one result per item.
+    """
+
+    def __init__(self, directory: str, lease_ttl: float = 60.0):
+        self.directory = directory
+        self.lease_ttl = lease_ttl
+        for name in (ITEMS_DIR, LEASES_DIR, DONE_DIR, NODES_DIR, RESULTS_DIR):
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def _lease_path(self, item_id: str) -> str:
+        return self._path(LEASES_DIR, f"{item_id}.lease")
+
+    @staticmethod
+    def item_id(file_path: str) -> str:
+        return hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+
+    def enqueue(self, file_paths: Iterable[str], language: str) -> int:
+        """Add files as work items; files already queued are skipped"""
+        added = 0
+        for file_path in file_paths:
+            item = {"path": os.path.abspath(file_path), "language": language}
+            if _create_exclusive(self._path(ITEMS_DIR, f"{self.item_id(file_path)}.json"), item):
+                added += 1
+        return added
+
+    def item_ids(self) -> List[str]:
+        return sorted(name[:-len(".json")] for name in os.listdir(self._path(ITEMS_DIR))
+                      if name.endswith(".json"))
+
+    def load_item(self, item_id: str) -> Dict:
+        with open(self._path(ITEMS_DIR, f"{item_id}.json"), encoding='utf-8') as f:
+            return json.load(f)
+
+    def record_attempt(self, item_id: str, error: str, retry_after: float) -> int:
+        """Count a failed attempt on a leased item; returns the attempts so far"""
+        item = self.load_item(item_id)
+        item["attempts"] = item.get("attempts", 0) + 1
+        item["last_error"] = error
+        item["retry_after"] = retry_after
+        _write_json_atomic(self._path(ITEMS_DIR, f"{item_id}.json"), item)
+        return item["attempts"]
+
+    def is_done(self, item_id: str) -> bool:
+        return os.path.exists(self._path(DONE_DIR, item_id))
+
+    def pending(self) -> List[str]:
+        done = set(os.listdir(self._path(DONE_DIR)))
+        return [item_id for item_id in self.item_ids() if item_id not in done]
+
+    def lease_age(self, item_id: str) -> Optional[float]:
+        try:
+            return time.time() - os.stat(self._lease_path(item_id)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def try_claim(self, item_id: str, node_id: str) -> bool:
+        """Take the item's lease, breaking it if its holder stopped heartbeating"""
+        lease_path = self._lease_path(item_id)
+        lease = {"node": node_id, "acquired": time.time()}
+        if _create_exclusive(lease_path, lease):
+            return True
+        age = self.lease_age(item_id)
+        if age is None or age < self.lease_ttl:
+            return False
+        # Rename is atomic, so exactly one node breaks an expired lease
+        broken_path = f"{lease_path}.expired-{node_id}-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(lease_path, broken_path)
+        except FileNotFoundError:
+            return False
+        # Another node may have broken the lease and taken a fresh one since
+        # the age was read; if the file we moved is fresh, put it back
+        if time.time() - os.stat(broken_path).st_mtime < self.lease_ttl:
+            self._restore_lease(broken_path, lease_path)
+            return False
+        try:
+            with open(broken_path, encoding='utf-8') as f:
+                previous = json.load(f).get("node")
+        except (OSError, ValueError):
+            previous = None
+        os.remove(broken_path)
+        logger.warning("Re-claiming %s from unresponsive node %s", item_id, previous)
+        return _create_exclusive(lease_path, lease)
+
+    @staticmethod
+    def _restore_lease(broken_path: str, lease_path: str):
+        """Move a lease taken by mistake back, unless the item was claimed anew"""
+        try:
+            # link fails if the path exists, so a newer lease is never replaced
+            os.link(broken_path, lease_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # No hard links on this filesystem; rename won't replace on Windows
+            try:
+                os.rename(broken_path, lease_path)
+            except OSError:
+                pass
+            else:
+                return
+        os.remove(broken_path)
+
+    def renew(self, item_id: str):
+        try:
+            os.utime(self._lease_path(item_id))
+        except FileNotFoundError:
+            pass
+
+    def release(self, item_id: str, node_id: str):
+        """Drop the lease if this node still holds it"""
+        lease_path = self._lease_path(item_id)
+        try:
+            with open(lease_path, encoding='utf-8') as f:
+                holder = json.load(f).get("node")
+        except (OSError, ValueError):
+            return
+        if holder == node_id:
+            try:
+                os.remove(lease_path)
+            except FileNotFoundError:
+                pass
+
+    def mark_done(self, item_id: str, node_id: str):
+        _create_exclusive(self._path(DONE_DIR, item_id), {"node": node_id, "time": time.time()})
+
+    def shard_path(self, node_id: str) -> str:
+        return self._path(RESULTS_DIR, f"{node_id}.jsonl")
+
+    def open_shard(self, node_id: str):
+        """Open a node's shard for appending, after cutting any torn last line"""
+        shard_path = self.shard_path(node_id)
+        _truncate_partial_line(shard_path)
+        return open(shard_path, 'a', encoding='utf-8')
+
+    def shard_paths(self) -> List[str]:
+        results_dir = self._path(RESULTS_DIR)
+        return [os.path.join(results_dir, name) for name in sorted(os.listdir(results_dir))
+                if name.endswith(".jsonl")]
+
+    def heartbeat(self, node_id: str, status: Dict):
+        _write_json_atomic(self._path(NODES_DIR, f"{node_id}.json"),
+                           dict(status, node=node_id, heartbeat=time.time()))
+
+    def nodes(self) -> List[Dict]:
+        nodes = []
+        for name in sorted(os.listdir(self._path(NODES_DIR))):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(self._path(NODES_DIR, name), encoding='utf-8') as f:
+                    node = json.load(f)
+            except (OSError, ValueError):
+                continue
+            node["age_s"] = time.time() - node["heartbeat"]
+            node["alive"] = node.get("state") != "stopped" and node["age_s"] < self.lease_ttl
+            nodes.append(node)
+        return nodes
+
+    def get_status(self) -> Dict:
+        items = self.item_ids()
+        done = set(os.listdir(self._path(DONE_DIR)))
+        leases = [name for name in os.listdir(self._path(LEASES_DIR)) if name.endswith(".lease")]
+        return {
+            "items": len(items),
+            "done": len(done),
+            "leased": len(leases),
+            "nodes": self.nodes(),
+        }
+
+
+class BatchWorker:
+    """One node of a distributed batch transcription
+
+    Claims pending items from a shared ``WorkQueue``, recognizes them with
+    the given system and appends results to this node's shard. A
+    heartbeat thread keeps held leases fresh; when nothing is claimable
+    but items are still leased elsewhere, the node keeps polling so it can
+    take over from nodes that die.
+
+    A retryable failure (connection error or timeout) releases the item
+    for another try after ``retry_delay`` seconds, doubling each time; after
+    ``max_attempts`` attempts the failure is recorded as the result.
+    """
+
+    def __init__(self,
+                 work_queue: WorkQueue,
+                 system: VoiceRecognitionSystem,
+                 node_id: Optional[str] = None,
+                 heartbeat_interval: Optional[float] = None,
+                 poll_interval: float = 2.0,
+                 max_attempts: int = 3,
+                 retry_delay: float = 5.0):
+        self.queue = work_queue
+        self.system = system
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval or work_queue.lease_ttl / 4
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.processed = 0
+        self.retried = 0
+        self._current: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            self._beat()
+
+    def _beat(self, state: str = "running"):
+        with self._lock:
+            current = self._current
+            if current is not None:
+                self.queue.renew(current)
+        try:
+            self.queue.heartbeat(self.node_id, {
+                "pid": os.getpid(),
+                "host": socket.gethostname(),
+                "state": state,
+                "current": current,
+                "processed": self.processed,
+                "retried": self.retried,
+            })
+        except OSError as e:
+            logger.error("Heartbeat failed: %s", e)
+
+    def _claim_next(self) -> Optional[str]:
+        pending = self.queue.pending()
+        if not pending:
+            return None
+        # Start at a random point so nodes don't all contend for the same item
+        start = random.randrange(len(pending))
+        for item_id in pending[start:] + pending[:start]:
+            if self.queue.try_claim(item_id, self.node_id):
+                if self.queue.is_done(item_id) or not self._due(item_id):
+                    # Finished between listing and claiming, or backing off
+                    self.queue.release(item_id, self.node_id)
+                    continue
+                return item_id
+        return None
+
+    def _due(self, item_id: str) -> bool:
+        try:
+            return self.queue.load_item(item_id).get("retry_after", 0) <= time.time()
+        except (OSError, ValueError):
+            return False
+
+    def _retry_later(self, item: Dict, item_id: str, error: str) -> bool:
+        """Count a retryable failure; True if the item should be tried again"""
+        attempts = item.get("attempts", 0) + 1
+        if attempts >= self.max_attempts:
+            logger.error("Giving up on %s after %d attempts: %s", item["path"], attempts, error)
+            return False
+        retry_after = time.time() + self.retry_delay * 2 ** (attempts - 1)
+        self.queue.record_attempt(item_id, error, retry_after)
+        self.retried += 1
+        logger.warning("Attempt %d on %s failed, will retry: %s", attempts, item["path"], error)
+        return True
+
+    def _process(self, item_id: str, shard):
+        item = self.queue.load_item(item_id)
+        record = {"item_id": item_id, "file": item["path"], "node": self.node_id}
+        try:
+            result = self.system.recognize_from_file(
+                item["path"], LanguageCode(item["language"])
+            )
+            if result.retryable and self._retry_later(item, item_id, result.error_message or ""):
+                return
+            record.update(result.to_dict())
+        except (ConnectionError, TimeoutError) as e:
+            if self._retry_later(item, item_id, str(e)):
+                return
+            record.update(success=False, text="", error_message=str(e))
+        except Exception as e:
+            # Record the failure rather than retrying a poison item forever
+            logger.error("Failed to process %s: %s", item["path"], e)
+            record.update(success=False, text="", error_message=str(e))
+        record["attempts"] = item.get("attempts", 0) + 1
+        shard.write(json.dumps(record, ensure_ascii=False) + "\n")
+        shard.flush()
+        os.fsync(shard.fileno())
+        self.queue.mark_done(item_id, self.node_id)
+        self.processed += 1
+
+    def run(self, max_items: Optional[int] = None) -> int:
+        """Work until every item is done; returns the number processed here"""
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="batch-heartbeat",
+                                     daemon=True)
+        self._beat()
+        heartbeat.start()
+        try:
+            with self.queue.open_shard(self.node_id) as shard:
+                while not self._stop.is_set():
+                    if max_items is not None and self.processed >= max_items:
+                        break
+                    item_id = self._claim_next()
+                    if item_id is None:
+                        if not self.queue.pending():
+                            break
+                        # Remaining items are leased; wait in case a holder dies
+                        self._stop.wait(self.poll_interval)
+                        continue
+                    with self._lock:
+                        self._current = item_id
+                    try:
+                        self._process(item_id, shard)
+                    finally:
+                        with self._lock:
+                            self._current = None
+                        self.queue.release(item_id, self.node_id)
+        finally:
+            self._stop.set()
+            heartbeat.join()
+            # So nodes() doesn't report this node alive until its heartbeat ages out
+            self._beat("stopped")
+        logger.info("Node %s processed %d items", self.node_id, self.processed)
+        return self.processed
+
+    def stop(self):
+        self._stop.set()
+
+
+def merge_results(work_queue: WorkQueue, output_path: str) -> int:
+    """Combine every node's shard into one JSON file, one result per item
+
+    Items processed more than once keep their first successful result.
+    Results are ordered like the queued items.
+    """
+    merged: Dict[str, Dict] = {}
+    for shard_path in work_queue.shard_paths():
+        with open(shard_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn last line from a node that died mid-write
+                    continue
+                existing = merged.get(record["item_id"])
+                if existing is None or (record["success"] and not existing["success"]):
+                    merged[record["item_id"]] = record
+
+    ordered = [merged[item_id] for item_id in work_queue.item_ids() if item_id in merged]
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(ordered, f, indent=2, ensure_ascii=False)
+    return len(ordered)
@@ -0,0 +1,223 @@
+import speech_recognition as sr
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+import logging
+import os
+import threading
+import time
+
+from .cancellation import CancellationToken, run_cancellable
+from .constants import LanguageCode
+from .recognition_engines import RecognitionEngine, sphinx_model_paths
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SphinxModel:
+    """Pocketsphinx acoustic model, language model and dictionary on disk"""
+
+    language: str
+    hmm: str
+    lm: str
+    dict: str
+
+    @classmethod
+    def from_language(cls, language: str, model_root: Optional[str] = None) -> "SphinxModel":
+        paths = sphinx_model_paths(language, model_root)
+        return cls(language, paths["hmm"], paths["lm"], paths["dict"])
+
+    @classmethod
+    def discover(cls, language: str, model_root: Optional[str] = None) -> Optional["SphinxModel"]:
+        """Return the model for ``language`` if one is installed"""
+        try:
+            return cls.from_language(language, model_root)
+        except ConnectionError:
+            return None
+
+    @property
+    def size_bytes(self) -> int:
+        """On-disk size, used as the estimate of the loaded model's memory"""
+        total = os.path.getsize(self.lm) + os.path.getsize(self.dict)
+        for directory, _, files in os.walk(self.hmm):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
+
+
+class _LoadedModel:
+
+    def __init__(self, decoder, size_bytes: int):
+        self.decoder = decoder
+        self.size_bytes = size_bytes
+        # Decoders are not thread-safe; one utterance at a time per model
+        self.lock = threading.Lock()
+
+
+class ModelCache:
+    """Loads pocketsphinx models on first use and evicts them LRU
+
+    Loaded models are kept within ``memory_budget`` bytes (estimated from
+    their size on disk). ``on_event`` is called with ``(event, language,
+    size_bytes)`` for every ``"load"`` and ``"evict"``.
+    """
+
+    def __init__(self,
+                 memory_budget: int = 512 * 1024 * 1024,
+                 on_event: Optional[Callable[[str, str, int], None]] = None):
+        self.memory_budget = memory_budget
+        self.on_event = on_event
+        self.loads = 0
+        self.evictions = 0
+        self.hits = 0
+        self._models: "OrderedDict[SphinxModel, _LoadedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One per model, held while it loads so it's loaded only once
+        self._loading: Dict[SphinxModel, threading.Lock] = {}
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(loaded.size_bytes for loaded in self._models.values())
+
+    def _emit(self, event: str, model: SphinxModel, size_bytes: int):
+        logger.info("Model %s: %s (%d bytes)", event, model.language, size_bytes)
+        if self.on_event is not None:
+            self.on_event(event, model.language, size_bytes)
+
+    def _load(self, model: SphinxModel) -> _LoadedModel:
+        try:
+            import pocketsphinx
+        except ImportError:
+            raise ConnectionError("Sphinx error: missing PocketSphinx module")
+        decoder = pocketsphinx.Decoder(
+            hmm=model.hmm, lm=model.lm, dict=model.dict, logfn=os.devnull
+        )
+        return _LoadedModel(decoder, model.size_bytes)
+
+    def _cached(self, model: SphinxModel) -> Optional[_LoadedModel]:
+        loaded = self._models.get(model)
+        if loaded is not None:
+            self._models.move_to_end(model)
+            self.hits += 1
+        return loaded
+
+    def get(self, model: SphinxModel) -> _LoadedModel:
+        """Return the loaded model, loading and evicting as needed
+
+        Loading takes only that model's lock, so a cold load never holds
+        up requests for other models.
+        """
+        with self._lock:
+            loaded = self._cached(model)
+            if loaded is not None:
+                return loaded
+            loading = self._loading.setdefault(model, threading.Lock())
+
+        with loading:
+            with self._lock:
+                # Loaded by another thread while this one waited
+                loaded = self._cached(model)
+                if loaded is not None:
+                    return loaded
+
+            started = time.perf_counter()
+            loaded = self._load(model)
+            logger.debug("Loaded %s in %.2fs", model.language, time.perf_counter() - started)
+
+            with self._lock:
+                self._models[model] = loaded
+                self.loads += 1
+                self._emit("load", model, loaded.size_bytes)
+
+                # Evict least recently used models, but never the one just loaded
+                while self.used_bytes > self.memory_budget and len(self._models) > 1:
+                    evicted_model, evicted = self._models.popitem(last=False)
+                    self.evictions += 1
+                    self._emit("evict", evicted_model, evicted.size_bytes)
+            return loaded
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded": [model.language for model in self._models],
+                "used_bytes": self.used_bytes,
+                "memory_budget": self.memory_budget,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "hits": self.hits,
+            }
+
+
+Route = Union[RecognitionEngine, SphinxModel]
+
+
+class EngineRouter(RecognitionEngine):
+    """Recognition engine that dispatches each language to its own backend
+
+    A route is either another ``RecognitionEngine`` or a ``SphinxModel``
+    decoded offline through a shared ``ModelCache``. Languages without a
+    route go to ``fallback``.
+    """
+
+    def __init__(self,
+                 routes: Optional[Dict[LanguageCode, Route]] = None,
+                 fallback: Optional[RecognitionEngine] = None,
+                 model_cache: Optional[ModelCache] = None):
+        self.routes: Dict[str, Route] = {}
+        self.fallback = fallback
+        self.model_cache = model_cache or ModelCache()
+        for language, target in (routes or {}).items():
+            self.route(language, target)
+
+    @classmethod
+    def with_installed_models(cls,
+                              fallback: Optional[RecognitionEngine] = None,
+                              model_root: Optional[str] = None,
+                              model_cache: Optional[ModelCache] = None) -> "EngineRouter":
+        """Route every language with an installed Sphinx model offline"""
+        router = cls(fallback=fallback, model_cache=model_cache)
+        for language in LanguageCode:
+            model = SphinxModel.discover(language.value, model_root)
+            if model is not None:
+                router.route(language, model)
+        return router
+
+    def route(self, language: LanguageCode, target: Route):
+        self.routes[language.value] = target
+
+    def resolve(self, language: str) -> Route:
+        target = self.routes.get(language, self.fallback)
+        if target is None:
+            raise ConnectionError(f"No recognition engine configured for {language}")
+        return target
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Tuple[str, Optional[float]]:
+
+        target = self.resolve(language)
+        if isinstance(target, RecognitionEngine):
+            return target.recognize(audio, language)
+        return self._decode(target, audio)
+
+    def recognize_cancellable(self,
+                              audio: sr.AudioData,
+                              language: str,
+                              token: Optional[CancellationToken]) -> Tuple[str, Optional[float]]:
+        target = self.resolve(language)
+        if isinstance(target, RecognitionEngine):
+            # Let the engine handle the token itself, e.g. a limited engine
+            # must not send a request cancelled while waiting for a slot
+            return target.recognize_cancellable(audio, language, token)
+        return run_cancellable(token, self._decode, target, audio)
+
+    def _decode(self, target: SphinxModel, audio: sr.AudioData) -> Tuple[str, Optional[float]]:
+        loaded = self.model_cache.get(target)
+        raw_data = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        with loaded.lock:
+            loaded.decoder.start_utt()
+            loaded.decoder.process_raw(raw_data, False, True)
+            loaded.decoder.end_utt()
+            hypothesis = loaded.decoder.hyp()
+        if hypothesis is None or not hypothesis.hypstr:
+            raise ValueError("Could not understand audio")
+        return hypothesis.hypstr, None
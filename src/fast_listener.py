@@ -0,0 +1,284 @@
+import speech_recognition as sr
+from typing import Optional, Tuple
+import math
+
+import numpy as np
+
+from .cancellation import CancellationToken
+
+
+_SAMPLE_TYPES = {1: "<i1", 2: "<i2", 4: "<i4"}
+
+# Audio per stream read; longer blocks cost less CPU per second of audio
+# but can delay the end of a live phrase by up to one block
+DEFAULT_BLOCK_SECONDS = 1.0
+
+# Least audio a live listener waits for before scanning; it wakes once per
+# scan instead of once per chunk, at up to this much added latency
+DEFAULT_SCAN_SECONDS = 0.25
+
+
+def pcm_samples(frames: bytes, sample_width: int) -> np.ndarray:
+    """Signed little-endian PCM as float64, the layout audioop assumes"""
+    if sample_width == 3:
+        raw = np.frombuffer(frames[:len(frames) - len(frames) % 3], dtype=np.uint8)
+        raw = raw.reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        return values.astype(np.float64)
+    usable = len(frames) - len(frames) % sample_width
+    return np.frombuffer(frames[:usable], dtype=_SAMPLE_TYPES[sample_width]).astype(np.float64)
+
+
+def chunk_energies(frames: bytes, sample_width: int, chunk_bytes: int) -> np.ndarray:
+    """RMS energy of each ``chunk_bytes`` chunk, truncated like ``audioop.rms``
+
+    A shorter final chunk (the end of a stream) gets its own energy.
+    """
+    samples = pcm_samples(frames, sample_width)
+    per_chunk = chunk_bytes // sample_width
+    if len(samples) <= per_chunk:
+        # A live stream often delivers one chunk at a time; skip the reshape
+        energy = float(np.dot(samples, samples)) / len(samples) if len(samples) else 0.0
+        return np.array([math.floor(math.sqrt(energy))], dtype=np.float64)
+    full = len(samples) // per_chunk
+    body = samples[:full * per_chunk].reshape(full, per_chunk)
+    energies = np.einsum('ij,ij->i', body, body) / per_chunk
+    if len(samples) > full * per_chunk:
+        tail = samples[full * per_chunk:]
+        energies = np.append(energies, np.dot(tail, tail) / len(tail))
+    return np.floor(np.sqrt(energies))
+
+
+def rms(frames: bytes, sample_width: int) -> int:
+    """``audioop.rms`` replacement for a single buffer"""
+    if len(frames) < sample_width:
+        return 0
+    return int(chunk_energies(frames, sample_width, len(frames))[0])
+
+
+def dynamic_thresholds(energies: np.ndarray,
+                       threshold: float,
+                       damping: float,
+                       ratio: float) -> np.ndarray:
+    """Energy threshold before each chunk, and after the last one
+
+    Closed form of the recurrence ``Recognizer.listen`` applies per chunk,
+    ``t[k+1] = t[k] * damping + energies[k] * ratio * (1 - damping)``.
+    """
+    count = len(energies)
+    powers = damping ** np.arange(count + 1, dtype=np.float64)
+    weighted = energies * ratio * (1 - damping) / powers[1:]
+    sums = np.concatenate(([0.0], np.cumsum(weighted)))
+    return powers * (threshold + sums)
+
+
+def find_onset(energies: np.ndarray,
+               threshold: float,
+               damping: Optional[float] = None,
+               ratio: float = 1.5) -> Tuple[int, float]:
+    """First chunk louder than the threshold, and the threshold afterwards
+
+    With ``damping`` the threshold adapts to the non-speech chunks before
+    the onset, exactly as ``Recognizer.listen`` does with
+    ``dynamic_energy_threshold``. Returns ``(-1, threshold)`` without an
+    onset, the threshold then reflecting every chunk.
+    """
+    if damping is None:
+        above = np.flatnonzero(energies > threshold)
+        return (int(above[0]) if len(above) else -1), threshold
+    if len(energies) == 1:
+        energy = float(energies[0])
+        if energy > threshold:
+            return 0, threshold
+        return -1, threshold * damping + energy * ratio * (1 - damping)
+    thresholds = dynamic_thresholds(energies, threshold, damping, ratio)
+    above = np.flatnonzero(energies > thresholds[:-1])
+    if len(above):
+        onset = int(above[0])
+        return onset, float(thresholds[onset])
+    return -1, float(thresholds[-1])
+
+
+def pause_runs(energies: np.ndarray, threshold: float, pause_count: int = 0) -> np.ndarray:
+    """Consecutive non-speech chunks ending at each chunk
+
+    ``pause_count`` carries the run from the previous block.
+    """
+    if len(energies) == 1:
+        return np.array([0 if energies[0] > threshold else pause_count + 1])
+    index = np.arange(len(energies))
+    last_speech = np.maximum.accumulate(np.where(energies > threshold, index, -1))
+    return np.where(last_speech >= 0, index - last_speech, pause_count + index + 1)
+
+
+class FastListener:
+    """Vectorized drop-in for ``Recognizer.listen``
+
+    Reads ``block_seconds`` of audio per stream read and computes chunk
+    energies, the dynamic threshold and pause detection with NumPy for the
+    whole block, using the recognizer's settings and chunk size so phrase,
+    timeout and threshold behaviour match. Audio read past the end of a
+    phrase is kept for the next call on the same stream rather than lost.
+    """
+
+    def __init__(self, recognizer: Optional[sr.Recognizer] = None, block_seconds: float = DEFAULT_BLOCK_SECONDS):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.block_seconds = block_seconds
+        self._pending = b""
+        self._stream = None
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def _attach(self, source: sr.AudioSource):
+        if source.stream is not self._stream:
+            # A reopened device; leftovers belong to the old stream
+            self._stream = source.stream
+            self._pending = b""
+
+    def _read(self,
+              source: sr.AudioSource,
+              max_chunks: int,
+              token: Optional[CancellationToken] = None) -> bytes:
+        if token is not None:
+            token.raise_if_cancelled()
+        chunk_bytes = source.CHUNK * source.SAMPLE_WIDTH
+        if self._pending:
+            block = self._pending[:max_chunks * chunk_bytes]
+            self._pending = self._pending[len(block):]
+            return block
+        return source.stream.read(source.CHUNK * max_chunks)
+
+    def _unread(self, data: bytes):
+        if data:
+            self._pending = data + self._pending
+
+    def _block_chunks(self, source: sr.AudioSource, token: Optional[CancellationToken] = None) -> int:
+        seconds = self.block_seconds
+        if token is not None:
+            # Short enough reads that cancellation is noticed promptly
+            seconds = min(seconds, DEFAULT_SCAN_SECONDS)
+        return max(1, int(seconds * source.SAMPLE_RATE / source.CHUNK))
+
+    def _damping(self, seconds_per_chunk: float) -> Optional[float]:
+        if not self.recognizer.dynamic_energy_threshold:
+            return None
+        return self.recognizer.dynamic_energy_adjustment_damping ** seconds_per_chunk
+
+    def adjust_for_ambient_noise(self,
+                                 source: sr.AudioSource,
+                                 duration: float = 1.0,
+                                 token: Optional[CancellationToken] = None):
+        """Same calibration as ``Recognizer.adjust_for_ambient_noise``"""
+        self._attach(source)
+        recognizer = self.recognizer
+        chunk_bytes = source.CHUNK * source.SAMPLE_WIDTH
+        seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        damping = recognizer.dynamic_energy_adjustment_damping ** seconds_per_chunk
+        remaining = int(math.floor(duration / seconds_per_chunk + 1e-9))
+        while remaining > 0:
+            block = self._read(source, min(remaining, self._block_chunks(source, token)), token)
+            if not block:
+                break
+            energies = chunk_energies(block, source.SAMPLE_WIDTH, chunk_bytes)
+            recognizer.energy_threshold = float(dynamic_thresholds(
+                energies, recognizer.energy_threshold, damping, recognizer.dynamic_energy_ratio
+            )[-1])
+            remaining -= len(energies)
+
+    def listen(self,
+               source: sr.AudioSource,
+               timeout: Optional[float] = None,
+               phrase_time_limit: Optional[float] = None,
+               token: Optional[CancellationToken] = None) -> sr.AudioData:
+        """Record one phrase from an entered ``source``
+
+        Raises ``sr.WaitTimeoutError`` if no phrase starts within
+        ``timeout`` seconds; cuts the phrase at ``phrase_time_limit``.
+        ``token`` is checked before every stream read.
+        """
+        assert source.stream is not None, "Audio source must be entered before listening"
+        self._attach(source)
+        recognizer = self.recognizer
+        width = source.SAMPLE_WIDTH
+        chunk_bytes = source.CHUNK * width
+        seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        pause_chunks = int(math.ceil(recognizer.pause_threshold / seconds_per_chunk))
+        phrase_chunks = int(math.ceil(recognizer.phrase_threshold / seconds_per_chunk))
+        keep_chunks = int(math.ceil(recognizer.non_speaking_duration / seconds_per_chunk))
+        block_chunks = self._block_chunks(source, token)
+        damping = self._damping(seconds_per_chunk)
+        # Chunks that may be read before the wait times out or the phrase is cut
+        wait_limit = (int(math.floor(timeout / seconds_per_chunk + 1e-9))
+                      if timeout else None)
+        phrase_limit = (int(math.floor(phrase_time_limit / seconds_per_chunk + 1e-9))
+                        if phrase_time_limit else None)
+
+        waited = 0
+        while True:
+            # Keep up to ``keep_chunks`` chunks before the onset, onset included
+            frames = b""
+            ended = False
+            while True:
+                if wait_limit is not None and waited >= wait_limit:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                max_chunks = block_chunks
+                if wait_limit is not None:
+                    max_chunks = min(max_chunks, wait_limit - waited)
+                block = self._read(source, max_chunks, token)
+                if not block:
+                    ended = True
+                    break
+                energies = chunk_energies(block, width, chunk_bytes)
+                onset, recognizer.energy_threshold = find_onset(
+                    energies, recognizer.energy_threshold, damping,
+                    recognizer.dynamic_energy_ratio
+                )
+                used = len(energies) if onset < 0 else onset + 1
+                waited += used
+                frames = frames + block[:used * chunk_bytes]
+                excess = -(-len(frames) // chunk_bytes) - keep_chunks
+                if excess > 0:
+                    frames = frames[excess * chunk_bytes:]
+                if onset >= 0:
+                    self._unread(block[used * chunk_bytes:])
+                    break
+
+            # Read until the pause is long enough or the time limit is hit
+            phrase = bytearray(frames)
+            last_length = len(frames) % chunk_bytes or chunk_bytes
+            pause_count = phrase_count = 0
+            while not ended:
+                if phrase_limit is not None and phrase_count >= phrase_limit:
+                    break
+                max_chunks = block_chunks
+                if phrase_limit is not None:
+                    max_chunks = min(max_chunks, phrase_limit - phrase_count)
+                block = self._read(source, max_chunks, token)
+                if not block:
+                    ended = True
+                    break
+                energies = chunk_energies(block, width, chunk_bytes)
+                runs = pause_runs(energies, recognizer.energy_threshold, pause_count)
+                stops = np.flatnonzero(runs > pause_chunks)
+                used = int(stops[0]) + 1 if len(stops) else len(energies)
+                pause_count = int(runs[used - 1])
+                phrase_count += used
+                consumed = block[:used * chunk_bytes]
+                phrase.extend(consumed)
+                last_length = len(consumed) - (used - 1) * chunk_bytes
+                self._unread(block[used * chunk_bytes:])
+                waited += used
+                if len(stops):
+                    break
+
+            if phrase_count - pause_count >= phrase_chunks or ended:
+                break
+
+        # Drop trailing silence beyond ``non_speaking_duration``
+        drop = pause_count - keep_chunks
+        if drop > 0:
+            del phrase[len(phrase) - ((drop - 1) * chunk_bytes + last_length):]
+        return sr.AudioData(bytes(phrase), source.SAMPLE_RATE, width)
@@ -0,0 +1,216 @@
+import speech_recognition as sr
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import json
+import sys
+import threading
+
+import numpy as np
+
+
+FRAME_SECONDS = 0.256
+HOP_SECONDS = 0.012
+NUM_BANDS = 33
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 3000.0
+# Frames transformed at once; bounds working memory whatever the clip length
+BLOCK_FRAMES = 256
+
+_band_edges = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, NUM_BANDS + 1)
+_bit_weights = (np.uint32(1) << np.arange(NUM_BANDS - 1, dtype=np.uint32))
+
+
+@lru_cache(maxsize=8)
+def _analysis_setup(sample_rate: int) -> Tuple[int, int, np.ndarray, np.ndarray]:
+    """Frame size, hop, window and band bin edges for a sample rate
+
+    Bands are defined in Hz and frames in seconds, so clips at different
+    sample rates produce comparable fingerprints without resampling.
+    """
+    frame_size = int(FRAME_SECONDS * sample_rate)
+    hop_size = max(1, round(HOP_SECONDS * sample_rate))
+    window = np.hanning(frame_size).astype(np.float32)
+    band_bins = np.round(_band_edges * frame_size / sample_rate).astype(np.intp)
+    return frame_size, hop_size, window, band_bins
+
+
+def compute_fingerprint(audio: sr.AudioData) -> np.ndarray:
+    """Compute a band-energy fingerprint: one 32-bit sub-fingerprint per hop
+
+    Each bit records whether the energy difference between two adjacent
+    bands rose or fell since the previous frame. This survives re-encoding
+    and level changes; heavily overlapped frames make it tolerant of
+    re-trimming at arbitrary sample offsets.
+    """
+    frame_size, hop_size, window, band_bins = _analysis_setup(audio.sample_rate)
+    raw = audio.get_raw_data(convert_width=2)
+    samples = np.frombuffer(raw, dtype="<i2")
+    if len(samples) < frame_size + hop_size:
+        return np.zeros(0, dtype=np.uint32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, frame_size)[::hop_size]
+    hashes = []
+    previous = None
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES].astype(np.float32) * window
+        power = np.abs(np.fft.rfft(block, axis=1)) ** 2
+        energies = np.add.reduceat(power, band_bins, axis=1)[:, :NUM_BANDS]
+        band_diff = energies[:, :-1] - energies[:, 1:]
+        if previous is not None:
+            # Carry the last frame over so hops across blocks get a hash too
+            band_diff = np.concatenate((previous, band_diff))
+        previous = band_diff[-1:]
+        bits = (band_diff[1:] - band_diff[:-1]) > 0
+        hashes.append((bits.astype(np.uint32) * _bit_weights).sum(axis=1, dtype=np.uint32))
+    return np.concatenate(hashes)
+
+
+def bit_error_rate(first: np.ndarray, second: np.ndarray) -> float:
+    """Fraction of differing bits between two equally long fingerprints"""
+    if len(first) == 0:
+        return 1.0
+    differing = np.unpackbits(np.bitwise_xor(first, second).view(np.uint8)).sum()
+    return float(differing) / (len(first) * 32)
+
+
+@dataclass
+class FingerprintMatch:
+    clip_id: int
+    text: str
+    language: str
+    bit_error_rate: float
+    offset: int
+
+
+class FingerprintIndex:
+    """Index of clip fingerprints for near-duplicate lookup
+
+    Every ``index_stride``-th sub-fingerprint of a clip goes into a hash
+    table. A query looks up its own sub-fingerprints, votes for
+    (clip, alignment offset) pairs, and verifies only the best few
+    candidates by bit error rate. Cost therefore depends on the query
+    length and bucket sizes, not on how many clips are indexed.
+    """
+
+    def __init__(self,
+                 max_bit_error_rate: float = 0.35,
+                 min_overlap: int = 64,
+                 index_stride: int = 4,
+                 max_candidates: int = 5,
+                 max_bucket_size: int = 1000):
+        self.max_bit_error_rate = max_bit_error_rate
+        self.min_overlap = min_overlap
+        self.index_stride = index_stride
+        self.max_candidates = max_candidates
+        self.max_bucket_size = max_bucket_size
+        self._fingerprints: List[np.ndarray] = []
+        self._metadata: List[Dict] = []
+        self._postings: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, fingerprint: np.ndarray, text: str, language: str) -> int:
+        """Index a clip and its transcript; returns the clip ID"""
+        with self._lock:
+            clip_id = len(self._fingerprints)
+            self._fingerprints.append(fingerprint)
+            self._metadata.append({"text": text, "language": language})
+            self._index_clip(clip_id, fingerprint)
+            return clip_id
+
+    def _index_clip(self, clip_id: int, fingerprint: np.ndarray):
+        for position in range(0, len(fingerprint), self.index_stride):
+            value = int(fingerprint[position])
+            # All-zero frames are silence and would match everything
+            if value == 0:
+                continue
+            self._postings.setdefault(value, []).append((clip_id << 32) | position)
+
+    def query(self,
+              fingerprint: np.ndarray,
+              language: Optional[str] = None) -> Optional[FingerprintMatch]:
+        """Find the best near-duplicate of a clip, if any is close enough"""
+        votes: Counter = Counter()
+        with self._lock:
+            for query_position, value in enumerate(fingerprint.tolist()):
+                if value == 0:
+                    continue
+                postings = self._postings.get(value)
+                if not postings or len(postings) > self.max_bucket_size:
+                    continue
+                for entry in postings:
+                    clip_id, position = entry >> 32, entry & 0xFFFFFFFF
+                    votes[(clip_id, position - query_position)] += 1
+
+            best = None
+            for (clip_id, offset), _ in votes.most_common(self.max_candidates):
+                metadata = self._metadata[clip_id]
+                if language is not None and metadata["language"] != language:
+                    continue
+                candidate = self._fingerprints[clip_id]
+                query_start = max(0, -offset)
+                clip_start = max(0, offset)
+                overlap = min(len(fingerprint) - query_start, len(candidate) - clip_start)
+                if overlap < self.min_overlap:
+                    continue
+                error_rate = bit_error_rate(
+                    fingerprint[query_start:query_start + overlap],
+                    candidate[clip_start:clip_start + overlap]
+                )
+                if error_rate <= self.max_bit_error_rate and (
+                        best is None or error_rate < best.bit_error_rate):
+                    best = FingerprintMatch(
+                        clip_id, metadata["text"], metadata["language"],
+                        error_rate, offset
+                    )
+            return best
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate memory held by the index, in bytes"""
+        with self._lock:
+            fingerprint_bytes = sum(fp.nbytes for fp in self._fingerprints)
+            posting_bytes = sys.getsizeof(self._postings) + sum(
+                sys.getsizeof(key) + sys.getsizeof(entries)
+                + sum(sys.getsizeof(entry) for entry in entries)
+                for key, entries in self._postings.items()
+            )
+            metadata_bytes = sum(
+                sys.getsizeof(meta) + sys.getsizeof(meta["text"])
+                for meta in self._metadata
+            )
+        return {
+            "clips": len(self._fingerprints),
+            "fingerprint_bytes": fingerprint_bytes,
+            "posting_bytes": posting_bytes,
+            "metadata_bytes": metadata_bytes,
+            "total_bytes": fingerprint_bytes + posting_bytes + metadata_bytes,
+        }
+
+    def save(self, file_path: str):
+        """Persist fingerprints and transcripts to a compressed ``.npz`` file"""
+        with self._lock:
+            lengths = np.array([len(fp) for fp in self._fingerprints], dtype=np.int64)
+            data = (np.concatenate(self._fingerprints) if self._fingerprints
+                    else np.zeros(0, dtype=np.uint32))
+            metadata = json.dumps(self._metadata, ensure_ascii=False)
+        with open(file_path, 'wb') as f:
+            np.savez_compressed(
+                f, fingerprints=data, lengths=lengths, metadata=np.array(metadata)
+            )
+
+    @classmethod
+    def load(cls, file_path: str, **kwargs) -> "FingerprintIndex":
+        """Rebuild an index saved with ``save``"""
+        index = cls(**kwargs)
+        with np.load(file_path) as archive:
+            data = archive["fingerprints"]
+            lengths = archive["lengths"]
+            metadata = json.loads(str(archive["metadata"]))
+        boundaries = np.cumsum(lengths)[:-1]
+        for fingerprint, meta in zip(np.split(data, boundaries), metadata):
+            index.add(fingerprint, meta["text"], meta["language"])
+        return index
@@ -0,0 +1,142 @@
+import speech_recognition as sr
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence
+import logging
+import os
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:
+    # Optional: pip install "multilingual-voice-recognition[flac]"
+    soundfile = None
+
+
+logger = logging.getLogger(__name__)
+
+FLAC_MAGIC = b"fLaC"
+DEFAULT_CHUNK_FRAMES = 64 * 1024
+
+# libsndfile subtype -> (dtype to read, bytes per output sample, right shift)
+# matching the sample width sr.AudioFile reports for the same file
+_SUBTYPE_LAYOUTS = {
+    "PCM_S8": ("int16", 1, 8),
+    "PCM_16": ("int16", 2, 0),
+    "PCM_24": ("int32", 3, 8),
+}
+
+
+def native_flac_available() -> bool:
+    return soundfile is not None
+
+
+def is_flac(file_path: str) -> bool:
+    """Whether the file starts with the FLAC stream marker"""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(FLAC_MAGIC)) == FLAC_MAGIC
+    except OSError:
+        return False
+
+
+class FlacDecoder:
+    """Decode a FLAC file in-process, a block of frames at a time
+
+    Output is mono little-endian PCM in the layout ``sr.AudioFile`` gives
+    for the same file: stereo channels are summed with clipping and 8, 16
+    and 24-bit streams keep their sample width. Only one block is held in
+    memory while iterating ``chunks``. Decoding runs in libsndfile without
+    the GIL, so separate decoders can use separate cores.
+    """
+
+    def __init__(self, file_path: str, chunk_frames: int = DEFAULT_CHUNK_FRAMES):
+        if soundfile is None:
+            raise RuntimeError("Native FLAC decoding requires the soundfile package")
+        self.file_path = file_path
+        self.chunk_frames = chunk_frames
+        self._file = soundfile.SoundFile(file_path)
+        if self._file.subtype not in _SUBTYPE_LAYOUTS:
+            self._file.close()
+            raise ValueError(f"Unsupported FLAC sample format: {self._file.subtype}")
+        if not 1 <= self._file.channels <= 2:
+            self._file.close()
+            raise ValueError("Audio must be mono or stereo")
+        self._dtype, self.sample_width, self._shift = _SUBTYPE_LAYOUTS[self._file.subtype]
+
+    @property
+    def sample_rate(self) -> int:
+        return self._file.samplerate
+
+    @property
+    def frames(self) -> int:
+        return self._file.frames
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def _to_pcm(self, block: np.ndarray) -> bytes:
+        if block.ndim == 1 and self.sample_width == 2:
+            return block.astype('<i2', copy=False).tobytes()
+        samples = block.astype(np.int64) >> self._shift
+        if samples.ndim == 2:
+            limit = 1 << (self.sample_width * 8 - 1)
+            samples = np.clip(samples.sum(axis=1), -limit, limit - 1)
+        if self.sample_width == 3:
+            packed = samples.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3]
+            return packed.tobytes()
+        return samples.astype(f"<i{self.sample_width}").tobytes()
+
+    def chunks(self,
+               offset: Optional[float] = None,
+               duration: Optional[float] = None) -> Iterator[bytes]:
+        """Yield PCM blocks of up to ``chunk_frames`` frames"""
+        self._file.seek(min(int((offset or 0) * self.sample_rate), self.frames))
+        frames = int(duration * self.sample_rate) if duration is not None else -1
+        for block in self._file.blocks(blocksize=self.chunk_frames, frames=frames,
+                                       dtype=self._dtype, always_2d=False):
+            yield self._to_pcm(block)
+
+    def read(self,
+             offset: Optional[float] = None,
+             duration: Optional[float] = None) -> sr.AudioData:
+        """Decode ``duration`` seconds from ``offset`` (default: everything)"""
+        frame_data = bytearray()
+        for chunk in self.chunks(offset, duration):
+            frame_data.extend(chunk)
+        return sr.AudioData(bytes(frame_data), self.sample_rate, self.sample_width)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def decode_flac(file_path: str,
+                offset: Optional[float] = None,
+                duration: Optional[float] = None) -> sr.AudioData:
+    with FlacDecoder(file_path) as decoder:
+        return decoder.read(offset, duration)
+
+
+def decode_files_parallel(file_paths: Sequence[str],
+                          workers: Optional[int] = None) -> List[Optional[sr.AudioData]]:
+    """Decode many FLAC files concurrently, one per worker thread
+
+    Returns the audio in input order, with None for files that could not
+    be decoded.
+    """
+    def decode(file_path: str) -> Optional[sr.AudioData]:
+        try:
+            return decode_flac(file_path)
+        except Exception as e:
+            logger.error("Error decoding %s: %s", file_path, e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        return list(executor.map(decode, file_paths))
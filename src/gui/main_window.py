@@ -1,14 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 import speech_recognition as sr
 
 from ..constants import LanguageCode
 from ..main import VoiceRecognitionSystem
-from ..recognition_engines import GoogleRecognitionEngine
+from ..models import RecognitionResult
+from ..audio_sources import BufferedMicrophoneSource
+from ..recognition_engines import GoogleRecognitionEngine, StreamingSphinxEngine
+from ..wake_word import WakeWordDetector, WakeWordSource
+from ..cancellation import CancellationToken, RequestCancelled
 from .styles import GUIStyles
 from .widgets import StatusBar, TextDisplayWidget, ControlPanel, HistoryPanel
+from .update_queue import UIUpdateQueue
 
 
 class VoiceRecognitionGUI:
@@ -17,12 +23,15 @@ class VoiceRecognitionGUI:
     def __init__(
         self, 
         root: tk.Tk, 
-        recognition_system: Optional[VoiceRecognitionSystem] = None
+        recognition_system: Optional[VoiceRecognitionSystem] = None,
+        wake_word: Optional[WakeWordDetector] = None,
+        mic_source: Optional[BufferedMicrophoneSource] = None
     ):
         self.root = root
         self.root.title("Multilingual Voice Recognition System")
         self.root.geometry("900x750")
         self.root.resizable(True, True)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Initialize recognition system
         if recognition_system is None:
@@ -31,20 +40,50 @@ class VoiceRecognitionGUI:
         
         self.vr_system = recognition_system
         
-        # Recognition state
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        # Recognition state: the microphone stays open and buffers audio
+        # continuously so phrase onsets are not clipped between utterances.
+        # A source over a ReplayMicrophone drives the GUI from a recorded session
+        self.mic_source = mic_source or BufferedMicrophoneSource()
+        self.recognizer = self.mic_source.recognizer
+        
+        # Optional local keyphrase gate: in continuous mode only speech that
+        # follows the wake phrase is sent to the recognition engine
+        self.wake_word = wake_word
+        self.wake_source = (
+            WakeWordSource(wake_word, self.mic_source) if wake_word else None
+        )
         self.is_listening = False
+        # Cancels the listen thread's current capture or recognition
+        self._token: Optional[CancellationToken] = None
         self.continuous_mode = False
         
         # Language mapping
         self.language_map = self._create_language_map()
+        self._language_names = {
+            code.value: name for name, code in self.language_map.items()
+        }
+        
+        # Worker threads post UI updates here; they are applied in batches
+        # at a fixed frame rate instead of one Tk call per event
+        self.ui_queue = UIUpdateQueue(self.root)
+        self.ui_queue.register_batch('results', self._display_results)
         
         # Setup GUI
         GUIStyles.setup_styles()
         self._create_gui()
+        self.ui_queue.start()
         self._adjust_for_noise()
     
+    def on_close(self):
+        """Release the microphone and close the window"""
+        self.is_listening = False
+        if self._token is not None:
+            self._token.cancel("Window closed")
+        self.ui_queue.stop()
+        self.mic_source.stop()
+        self.vr_system.close_sinks(timeout=2.0)
+        self.root.destroy()
+    
     def _create_language_map(self):
         """Create language name to code mapping"""
         return {
@@ -108,11 +147,18 @@ class VoiceRecognitionGUI:
         self.text_display.grid(
             row=3, column=0, pady=(0, 10), sticky=(tk.W, tk.E, tk.N, tk.S)
         )
+        self.text_display.language_label = self._language_name
         
         # History Panel
         self.history_panel = HistoryPanel(main_container)
         self.history_panel.grid(row=4, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
         
+        # Both views keep a bounded window and page the rest from the
+        # system's history
+        history_size = lambda: len(self.vr_system.get_history())
+        self.text_display.attach_store(self.vr_system.get_history_page, history_size)
+        self.history_panel.attach_store(self.vr_system.get_history_page, history_size)
+        
         # Bottom Buttons
         self._create_bottom_buttons(main_container)
     
@@ -157,11 +203,10 @@ class VoiceRecognitionGUI:
         
         def adjust():
             try:
-                with self.microphone as source:
-                    self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                self.status_bar.update_status("Ready to listen...")
+                self.mic_source.adjust_for_ambient_noise(duration=1)
+                self._post_status("Ready to listen...")
             except Exception as e:
-                self.status_bar.update_status(f"Error: {str(e)}", 'error')
+                self._post_status(f"Error: {str(e)}", 'error')
         
         thread = threading.Thread(target=adjust, daemon=True)
         thread.start()
@@ -170,9 +215,14 @@ class VoiceRecognitionGUI:
         """Toggle continuous listening mode"""
         self.continuous_mode = self.control_panel.get_continuous_mode()
         if self.continuous_mode and self.is_listening:
-            self.status_bar.update_status(
-                "Continuous mode enabled - keep speaking..."
-            )
+            if self.wake_word is not None:
+                self.status_bar.update_status(
+                    f'Continuous mode enabled - say "{self.wake_word.keyphrase}" first...'
+                )
+            else:
+                self.status_bar.update_status(
+                    "Continuous mode enabled - keep speaking..."
+                )
     
     def start_listening(self):
         """Start listening for speech"""
@@ -190,77 +240,168 @@ class VoiceRecognitionGUI:
     def stop_listening(self):
         """Stop listening"""
         self.is_listening = False
+        if self._token is not None:
+            # Unblock the listen thread now instead of after its timeouts
+            self._token.cancel("Stopped listening")
         self.continuous_mode = False
         self.control_panel.set_continuous_mode(False)
         self.control_panel.enable_start()
         self.status_bar.set_indicator_color('gray')
         self.status_bar.update_status("Stopped listening.")
     
+    def _post_status(self, message: str, status_type: str = 'normal'):
+        """Update the status bar on the next UI frame (thread-safe)"""
+        self.ui_queue.post(
+            self.status_bar.update_status, message, status_type, key='status'
+        )
+    
+    def _post_indicator(self, color: str):
+        """Set the indicator color on the next UI frame (thread-safe)"""
+        self.ui_queue.post(self.status_bar.set_indicator_color, color, key='indicator')
+    
+    def _publish_result(
+        self, 
+        language_code: LanguageCode, 
+        text: str = "", 
+        error_message: Optional[str] = None,
+        request_id: Optional[str] = None
+    ):
+        """Record a result in the system history and queue it for display"""
+        result = RecognitionResult(
+            text=text,
+            language=language_code.value,
+            confidence=None,
+            timestamp=datetime.now(),
+            success=error_message is None,
+            error_message=error_message,
+            request_id=request_id
+        )
+        self.vr_system.record_result(result)
+        self.ui_queue.post_item('results', result)
+    
     def _listen_thread(self):
         """Background thread for listening"""
         while self.is_listening:
+            woke = False
+            request_id = None
+            token = self._token = CancellationToken()
+            if not self.is_listening:
+                # stop_listening ran before this token was published
+                break
+            language_code = self.vr_system.default_language
             try:
                 selected_language_name = self.control_panel.get_selected_language()
                 language_code = self.language_map[selected_language_name]
                 
-                with self.microphone as source:
-                    audio = self.recognizer.listen(
-                        source, timeout=5, phrase_time_limit=10
-                    )
-                
-                self.status_bar.update_status("Recognizing...")
-                self.status_bar.set_indicator_color('yellow')
+                if self.wake_source is not None and self.continuous_mode:
+                    if not self.wake_source.wait_for_wake_word(timeout=1.0, token=token):
+                        continue
+                    woke = True
+                    self._post_status("Listening... Speak now!")
                 
-                # Use the recognition system
-                text = self.recognizer.recognize_google(
-                    audio, language=language_code.value
-                )
+                if isinstance(self.vr_system.engine, StreamingSphinxEngine):
+                    text, request_id = self._listen_streaming(
+                        language_code, selected_language_name, token
+                    )
+                else:
+                    audio = self.mic_source.listen(
+                        timeout=5, phrase_time_limit=10, token=token
+                    )
+                    if audio is None:
+                        raise RuntimeError("Microphone capture stopped")
+                    request_id = self.vr_system.archive_audio(audio, language_code.value)
+                    
+                    self._post_status("Recognizing...")
+                    self._post_indicator('yellow')
+                    
+                    # Use the recognition system's engine
+                    text, _ = self.vr_system.engine.recognize_cancellable(
+                        audio, language_code.value, token
+                    )
                 
                 # Display result
-                self.root.after(
-                    0, self._display_recognition, 
-                    text, selected_language_name
-                )
+                self._publish_result(language_code, text, request_id=request_id)
                 
                 if not self.continuous_mode:
-                    self.root.after(0, self.stop_listening)
+                    self.ui_queue.post(self.stop_listening, key='stop')
                 else:
-                    self.status_bar.set_indicator_color('red')
-                    self.status_bar.update_status("Listening... Speak now!")
+                    self._post_indicator('red')
+                    self._post_status("Listening... Speak now!")
                     
+            except RequestCancelled:
+                break
             except sr.WaitTimeoutError:
+                if woke:
+                    self.wake_word.mark_false_trigger()
                 if not self.continuous_mode:
-                    self.root.after(
-                        0, self.status_bar.update_status, 
-                        "No speech detected.", 'error'
-                    )
-                    self.root.after(0, self.stop_listening)
-            except sr.UnknownValueError:
-                self.root.after(
-                    0, self._display_error, "Could not understand audio"
+                    self._post_status("No speech detected.", 'error')
+                    self.ui_queue.post(self.stop_listening, key='stop')
+            except (sr.UnknownValueError, ValueError):
+                if woke:
+                    self.wake_word.mark_false_trigger()
+                self._publish_result(
+                    language_code, error_message="Could not understand audio",
+                    request_id=request_id
                 )
                 if not self.continuous_mode:
-                    self.root.after(0, self.stop_listening)
-            except sr.RequestError as e:
-                self.root.after(0, self._display_error, f"API Error: {str(e)}")
-                self.root.after(0, self.stop_listening)
+                    self.ui_queue.post(self.stop_listening, key='stop')
+            except (sr.RequestError, ConnectionError) as e:
+                self._publish_result(
+                    language_code, error_message=f"API Error: {str(e)}",
+                    request_id=request_id
+                )
+                self.ui_queue.post(self.stop_listening, key='stop')
             except Exception as e:
-                self.root.after(0, self._display_error, f"Error: {str(e)}")
-                self.root.after(0, self.stop_listening)
+                self._publish_result(language_code, error_message=f"Error: {str(e)}")
+                self.ui_queue.post(self.stop_listening, key='stop')
     
-    def _display_recognition(self, text: str, language: str):
-        """Display recognized text"""
-        self.text_display.add_recognition(text, language)
-        self.history_panel.add_entry(text)
-        self.status_bar.update_status(
-            f"Recognized: {text[:30]}...", 'success'
+    def _listen_streaming(
+        self, language_code: LanguageCode, language_name: str, token: CancellationToken
+    ) -> Tuple[str, str]:
+        """Decode while capturing, showing partial hypotheses as they arrive
+
+        Returns the transcript and the result ID the audio was archived under.
+        """
+        def on_partial(text):
+            self.ui_queue.post(
+                self.text_display.show_partial, text, language_name, key='partial'
+            )
+        
+        stream = self.vr_system.engine.start_stream(
+            language_code.value,
+            on_partial=on_partial,
+            sample_rate=self.mic_source.sample_rate,
+            sample_width=self.mic_source.sample_width
         )
-        self.status_bar.set_indicator_color('green')
+        try:
+            audio = self.mic_source.listen(
+                timeout=5, phrase_time_limit=10, on_frames=stream.process, token=token
+            )
+            if audio is None:
+                raise RuntimeError("Microphone capture stopped")
+            request_id = self.vr_system.archive_audio(audio, language_code.value)
+            text, _ = stream.finish()
+            return text, request_id
+        finally:
+            stream.close()
+    
+    def _display_results(self, results: List[RecognitionResult]):
+        """Render a frame's worth of results with one update per widget"""
+        self.text_display.add_results(results)
+        self.history_panel.add_results(results)
+        
+        last = results[-1]
+        if last.success:
+            self.status_bar.update_status(
+                f"Recognized: {last.text[:30]}...", 'success'
+            )
+            self.status_bar.set_indicator_color('green')
+        else:
+            self.status_bar.update_status(last.error_message, 'error')
     
-    def _display_error(self, error_message: str):
-        """Display error message"""
-        self.text_display.add_error(error_message)
-        self.status_bar.update_status(error_message, 'error')
+    def _language_name(self, code: str) -> str:
+        """Display name for a language code"""
+        return self._language_names.get(code, code)
     
     def clear_text(self):
         """Clear text display"""
@@ -276,7 +417,7 @@ class VoiceRecognitionGUI:
     
     def save_to_file(self):
         """Save recognized text to file"""
-        text_content = self.text_display.get_text()
+        text_content = self.text_display.get_full_text()
         
         if not text_content:
             messagebox.showwarning("No Content", "There is no text to save.")
@@ -300,7 +441,7 @@ class VoiceRecognitionGUI:
     
     def copy_text(self):
         """Copy text to clipboard"""
-        text_content = self.text_display.get_text()
+        text_content = self.text_display.get_full_text()
         
         if not text_content:
             messagebox.showwarning("No Content", "There is no text to copy.")
@@ -0,0 +1,70 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class UIUpdateQueue:
+    """Coalescing queue of UI updates flushed on the Tk thread at a fixed rate
+
+    Worker threads post updates instead of calling ``root.after`` for each
+    one. Every frame the queue runs pending updates in order:
+
+    - ``post(callback, *args, key=...)``: a later update with the same key
+      replaces a pending one (status text, partial hypotheses)
+    - ``post_item(channel, item)``: consecutive items for one channel are
+      delivered together to the handler from ``register_batch``
+    """
+
+    def __init__(self, root, fps: int = 20):
+        self.root = root
+        self.interval_ms = max(1, int(1000 / fps))
+        self._pending: List[list] = []
+        self._keyed: Dict[Hashable, list] = {}
+        self._batch_handlers: Dict[str, Callable[[List[Any]], None]] = {}
+        self._lock = threading.Lock()
+        self._after_id: Optional[str] = None
+
+    def register_batch(self, channel: str, handler: Callable[[List[Any]], None]):
+        self._batch_handlers[channel] = handler
+
+    def post(self, callback: Callable, *args, key: Optional[Hashable] = None):
+        """Schedule ``callback(*args)`` for the next frame"""
+        with self._lock:
+            if key is not None and key in self._keyed:
+                # Keep the original position, run with the newest arguments
+                self._keyed[key][1:] = [callback, args]
+                return
+            entry = ["call", callback, args]
+            self._pending.append(entry)
+            if key is not None:
+                self._keyed[key] = entry
+
+    def post_item(self, channel: str, item: Any):
+        """Queue ``item`` for the channel's batch handler"""
+        with self._lock:
+            if self._pending and self._pending[-1][0] == "batch" \
+                    and self._pending[-1][1] == channel:
+                self._pending[-1][2].append(item)
+            else:
+                self._pending.append(["batch", channel, [item]])
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._flush)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._keyed.clear()
+        try:
+            for kind, target, payload in pending:
+                if kind == "batch":
+                    self._batch_handlers[target](payload)
+                else:
+                    target(*payload)
+        finally:
+            self._after_id = self.root.after(self.interval_ms, self._flush)
@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-from typing import Callable, Dict
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 from datetime import datetime
 
+from ..models import RecognitionResult
+
 
 class StatusBar(ttk.Frame):
     """Custom status bar with indicator"""
@@ -50,9 +53,20 @@ class StatusBar(ttk.Frame):
 
 
 class TextDisplayWidget(ttk.LabelFrame):
-    """Custom text display widget with formatting"""
+    """Custom text display widget with formatting
+    
+    At most ``max_entries`` entries are kept in the Tk widget. When a
+    history store is attached, entries outside that window are paged back
+    in from the store as the view is scrolled to either end.
+    """
     
-    def __init__(self, parent, title: str = "Recognized Text"):
+    def __init__(
+        self, 
+        parent, 
+        title: str = "Recognized Text",
+        max_entries: int = 500,
+        page_size: int = 100
+    ):
         super().__init__(parent, text=title, padding="10")
         
         self.columnconfigure(0, weight=1)
@@ -68,9 +82,24 @@ class TextDisplayWidget(ttk.LabelFrame):
             fg='#2c3e50'
         )
         self.text_widget.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.text_widget.config(yscrollcommand=self._on_yscroll)
         
         # Configure text tags
         self._setup_tags()
+        self._has_partial = False
+        
+        # Virtualization state: line count of each displayed entry and the
+        # store index of the first one
+        self.max_entries = max_entries
+        self.page_size = page_size
+        self.language_label: Callable[[str], str] = lambda code: code
+        self._entry_lines: Deque[int] = deque()
+        self._fetch: Optional[Callable[[int, int], List[RecognitionResult]]] = None
+        self._count: Optional[Callable[[], int]] = None
+        self._first_index = 0
+        self._floor = 0
+        self._detached = False
+        self._paging = False
     
     def _setup_tags(self):
         """Setup text formatting tags"""
@@ -89,34 +118,201 @@ class TextDisplayWidget(ttk.LabelFrame):
             foreground='#2c3e50', 
             font=('Arial', 12)
         )
+        self.text_widget.tag_configure(
+            'partial', 
+            foreground='#95a5a6', 
+            font=('Arial', 12, 'italic')
+        )
         self.text_widget.tag_configure(
             'error', 
             foreground='#e74c3c', 
             font=('Arial', 10, 'italic')
         )
     
+    def attach_store(
+        self, 
+        fetch: Callable[[int, int], List[RecognitionResult]], 
+        count: Callable[[], int]
+    ):
+        """Page older and newer entries from a history store on scroll"""
+        self._fetch = fetch
+        self._count = count
+        self._first_index = self._floor = count() - len(self._entry_lines)
+    
+    def show_partial(self, text: str, language: str):
+        """Show or replace the interim hypothesis for the current utterance"""
+        self.clear_partial()
+        self.text_widget.mark_set('partial_start', 'end-1c')
+        self.text_widget.mark_gravity('partial_start', tk.LEFT)
+        self.text_widget.insert(tk.END, f"({language}) {text}…", 'partial')
+        self.text_widget.see(tk.END)
+        self._has_partial = True
+    
+    def clear_partial(self):
+        """Remove the interim hypothesis, if any"""
+        if not self._has_partial:
+            return
+        self.text_widget.delete('partial_start', 'end-1c')
+        self.text_widget.mark_unset('partial_start')
+        self._has_partial = False
+    
+    @staticmethod
+    def _recognition_segments(text: str, language: str, timestamp: datetime):
+        return [
+            (f"[{timestamp.strftime('%H:%M:%S')}] ", 'timestamp'),
+            (f"({language}) ", 'language'),
+            (f"{text}\n\n", 'text'),
+        ]
+    
+    @staticmethod
+    def _error_segments(error_message: str, timestamp: datetime):
+        return [
+            (f"[{timestamp.strftime('%H:%M:%S')}] ", 'timestamp'),
+            (f"❌ {error_message}\n\n", 'error'),
+        ]
+    
+    def _result_segments(self, result: RecognitionResult):
+        if result.success:
+            return self._recognition_segments(
+                result.text, self.language_label(result.language), result.timestamp
+            )
+        return self._error_segments(result.error_message or "", result.timestamp)
+    
+    @staticmethod
+    def _flatten(entries) -> Tuple[list, List[int]]:
+        """Tk insert arguments and line counts for a list of entries"""
+        args, lines = [], []
+        for segments in entries:
+            for chunk, tag in segments:
+                args.extend((chunk, tag))
+            lines.append(sum(chunk.count('\n') for chunk, _ in segments))
+        return args, lines
+    
+    def _append(self, entries):
+        """Insert entries at the end in one Tk call, trimming the oldest"""
+        if not entries:
+            return
+        self.clear_partial()
+        at_bottom = self.text_widget.yview()[1] >= 0.999
+        args, lines = self._flatten(entries)
+        self.text_widget.insert(tk.END, *args)
+        self._entry_lines.extend(lines)
+        excess = len(self._entry_lines) - self.max_entries
+        if at_bottom:
+            self._trim_top(excess)
+            self.text_widget.see(tk.END)
+        elif excess > 0:
+            # Keep the line the user is reading at the top of the view
+            top_line = int(self.text_widget.index('@0,0').split('.')[0])
+            trimmed_lines = self._trim_top(excess)
+            self.text_widget.yview(f'{max(1, top_line - trimmed_lines)}.0')
+    
+    def _trim_top(self, count: int) -> int:
+        """Remove the oldest ``count`` entries; returns the lines removed"""
+        if count <= 0:
+            return 0
+        lines = sum(self._entry_lines.popleft() for _ in range(count))
+        self.text_widget.delete('1.0', f'{lines + 1}.0')
+        self._first_index += count
+        return lines
+    
+    def _trim_bottom(self, count: int):
+        if count <= 0:
+            return
+        total = sum(self._entry_lines)
+        lines = sum(self._entry_lines.pop() for _ in range(count))
+        self.text_widget.delete(f'{total - lines + 1}.0', f'{total + 1}.0')
+        self._detached = True
+    
+    def add_results(self, results: List[RecognitionResult]):
+        """Add a batch of results; the fast path for live updates"""
+        if self._detached:
+            # Scrolled back in a store-backed view; they'll be paged in
+            return
+        self._append([self._result_segments(result) for result in results])
+    
     def add_recognition(self, text: str, language: str):
         """Add recognized text with formatting"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.text_widget.insert(tk.END, f"[{timestamp}] ", 'timestamp')
-        self.text_widget.insert(tk.END, f"({language}) ", 'language')
-        self.text_widget.insert(tk.END, f"{text}\n\n", 'text')
-        self.text_widget.see(tk.END)
+        self._append([self._recognition_segments(text, language, datetime.now())])
     
     def add_error(self, error_message: str):
         """Add error message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.text_widget.insert(tk.END, f"[{timestamp}] ", 'timestamp')
-        self.text_widget.insert(tk.END, f"❌ {error_message}\n\n", 'error')
-        self.text_widget.see(tk.END)
+        self._append([self._error_segments(error_message, datetime.now())])
+    
+    def _on_yscroll(self, first: str, last: str):
+        self.text_widget.vbar.set(first, last)
+        if self._fetch is None or self._paging:
+            return
+        if float(first) <= 0.0 and self._first_index > self._floor:
+            self._paging = True
+            self.after_idle(self._load_older)
+        elif float(last) >= 1.0 and self._detached:
+            self._paging = True
+            self.after_idle(self._load_newer)
+    
+    def _load_older(self):
+        """Prepend the page before the first displayed entry"""
+        try:
+            start = max(self._floor, self._first_index - self.page_size)
+            results = self._fetch(start, self._first_index - start)
+            args, lines = self._flatten(
+                [self._result_segments(result) for result in results]
+            )
+            if args:
+                self.text_widget.insert('1.0', *args)
+            self._entry_lines.extendleft(reversed(lines))
+            self._first_index = start
+            self._trim_bottom(len(self._entry_lines) - self.max_entries - self.page_size)
+            # Keep the previously first entry where the user was looking
+            self.text_widget.yview(f'{sum(lines) + 1}.0')
+        finally:
+            self._paging = False
+    
+    def _load_newer(self):
+        """Append the page after the last displayed entry"""
+        try:
+            end_index = self._first_index + len(self._entry_lines)
+            total = self._count()
+            stop = min(total, end_index + self.page_size)
+            results = self._fetch(end_index, stop - end_index)
+            args, lines = self._flatten(
+                [self._result_segments(result) for result in results]
+            )
+            insert_at = f'{sum(self._entry_lines) + 1}.0'
+            if args:
+                self.text_widget.insert(insert_at, *args)
+            self._entry_lines.extend(lines)
+            self._detached = stop < total
+            excess = len(self._entry_lines) - self.max_entries - self.page_size
+            if excess > 0:
+                trimmed_lines = self._trim_top(excess)
+                insert_at = f'{int(insert_at.split(".")[0]) - trimmed_lines}.0'
+            self.text_widget.yview(insert_at)
+        finally:
+            self._paging = False
     
     def get_text(self) -> str:
         """Get all text content"""
         return self.text_widget.get(1.0, tk.END).strip()
     
+    def get_full_text(self) -> str:
+        """All text since the last clear, including entries not on screen"""
+        if self._fetch is None:
+            return self.get_text()
+        results = self._fetch(self._floor, self._count() - self._floor)
+        return "".join(
+            chunk for result in results for chunk, _ in self._result_segments(result)
+        ).strip()
+    
     def clear(self):
         """Clear all text"""
         self.text_widget.delete(1.0, tk.END)
+        self._has_partial = False
+        self._entry_lines.clear()
+        self._detached = False
+        if self._count is not None:
+            # Cleared entries are not paged back in
+            self._first_index = self._floor = self._count()
 
 
 class ControlPanel(ttk.LabelFrame):
@@ -216,9 +412,20 @@ class ControlPanel(ttk.LabelFrame):
 
 
 class HistoryPanel(ttk.LabelFrame):
-    """Recognition history panel"""
+    """Recognition history panel
     
-    def __init__(self, parent, title: str = "Recognition History"):
+    Shows the newest entries first and keeps at most ``max_rows`` rows in
+    the listbox. With a history store attached, older and newer pages are
+    loaded from the store as the list is scrolled to either end.
+    """
+    
+    def __init__(
+        self, 
+        parent, 
+        title: str = "Recognition History",
+        max_rows: int = 500,
+        page_size: int = 100
+    ):
         super().__init__(parent, text=title, padding="10")
         
         self.columnconfigure(0, weight=1)
@@ -233,21 +440,117 @@ class HistoryPanel(ttk.LabelFrame):
         self.listbox.grid(row=0, column=0, sticky=(tk.W, tk.E))
         
         # Scrollbar
-        scrollbar = ttk.Scrollbar(
+        self.scrollbar = ttk.Scrollbar(
             self, 
             orient=tk.VERTICAL, 
             command=self.listbox.yview
         )
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        self.listbox.config(yscrollcommand=scrollbar.set)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.listbox.config(yscrollcommand=self._on_yscroll)
+        
+        # Virtualization state: store index one past the newest row shown
+        self.max_rows = max_rows
+        self.page_size = page_size
+        self._fetch: Optional[Callable[[int, int], List[RecognitionResult]]] = None
+        self._count: Optional[Callable[[], int]] = None
+        self._end_index = 0
+        self._floor = 0
+        self._live = True
+        self._paging = False
+    
+    def attach_store(
+        self, 
+        fetch: Callable[[int, int], List[RecognitionResult]], 
+        count: Callable[[], int]
+    ):
+        """Page older and newer rows from a history store on scroll"""
+        self._fetch = fetch
+        self._count = count
+        self._end_index = count()
+        self._floor = self._end_index - self.listbox.size()
+    
+    @staticmethod
+    def _format_row(text: str, timestamp: datetime) -> str:
+        display_text = text[:50] + ('...' if len(text) > 50 else '')
+        return f"{timestamp.strftime('%H:%M:%S')} - {display_text}"
+    
+    def _result_row(self, result: RecognitionResult) -> str:
+        if result.success:
+            return self._format_row(result.text, result.timestamp)
+        return self._format_row(f"❌ {result.error_message or ''}", result.timestamp)
+    
+    def _insert_newest(self, rows: List[str]):
+        """Insert rows (oldest first) at the top in one Tk call"""
+        if not rows:
+            return
+        self.listbox.insert(0, *reversed(rows))
+        if self.listbox.size() > self.max_rows:
+            self.listbox.delete(self.max_rows, tk.END)
+    
+    def add_results(self, results: List[RecognitionResult]):
+        """Add a batch of results; the fast path for live updates"""
+        if not self._live:
+            # Scrolled into older pages; newer rows load on scroll to top
+            return
+        self._insert_newest([self._result_row(result) for result in results])
+        self._end_index += len(results)
     
     def add_entry(self, text: str):
         """Add entry to history"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        display_text = text[:50] + ('...' if len(text) > 50 else '')
-        entry = f"{timestamp} - {display_text}"
-        self.listbox.insert(0, entry)
+        self._insert_newest([self._format_row(text, datetime.now())])
+    
+    def _on_yscroll(self, first: str, last: str):
+        self.scrollbar.set(first, last)
+        if self._fetch is None or self._paging:
+            return
+        oldest_shown = self._end_index - self.listbox.size()
+        if float(last) >= 1.0 and oldest_shown > self._floor:
+            self._paging = True
+            self.after_idle(self._load_older)
+        elif float(first) <= 0.0 and not self._live:
+            self._paging = True
+            self.after_idle(self._load_newer)
+    
+    def _load_older(self):
+        """Append the page of rows older than the bottom row"""
+        try:
+            oldest_shown = self._end_index - self.listbox.size()
+            start = max(self._floor, oldest_shown - self.page_size)
+            results = self._fetch(start, oldest_shown - start)
+            rows = [self._result_row(result) for result in reversed(results)]
+            if rows:
+                self.listbox.insert(tk.END, *rows)
+            excess = self.listbox.size() - self.max_rows - self.page_size
+            if excess > 0:
+                self.listbox.delete(0, excess - 1)
+                self._end_index -= excess
+                self._live = False
+                self.listbox.yview(max(0, self.listbox.size() - len(rows) - 1))
+        finally:
+            self._paging = False
+    
+    def _load_newer(self):
+        """Prepend the page of rows newer than the top row"""
+        try:
+            total = self._count()
+            stop = min(total, self._end_index + self.page_size)
+            results = self._fetch(self._end_index, stop - self._end_index)
+            rows = [self._result_row(result) for result in results]
+            if rows:
+                self.listbox.insert(0, *reversed(rows))
+            self._end_index = stop
+            self._live = stop >= total
+            excess = self.listbox.size() - self.max_rows - self.page_size
+            if excess > 0:
+                self.listbox.delete(self.listbox.size() - excess, tk.END)
+            self.listbox.yview(len(rows))
+        finally:
+            self._paging = False
     
     def clear(self):
         """Clear all history"""
-        self.listbox.delete(0, tk.END)
\ No newline at end of file
+        self.listbox.delete(0, tk.END)
+        self._live = True
+        if self._count is not None:
+            # Cleared rows are not paged back in
+            self._end_index = self._floor = self._count()
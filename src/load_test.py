@@ -0,0 +1,472 @@
+import speech_recognition as sr
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import array
+import json
+import logging
+import math
+import os
+import platform
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from .audio_sources import AudioSource, FileSource
+from .constants import LanguageCode
+from .main import VoiceRecognitionSystem
+from .recognition_engines import RecognitionEngine
+from .session_replay import ReplaySource, Session
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticSource(AudioSource):
+    """Audio source producing a generated tone, for runs without recordings"""
+
+    def __init__(self,
+                 duration: float = 3.0,
+                 sample_rate: int = 16000,
+                 frequency: float = 440.0,
+                 amplitude: int = 8000):
+        super().__init__()
+        samples = array.array('h', (
+            int(amplitude * math.sin(2 * math.pi * frequency * i / sample_rate))
+            for i in range(int(duration * sample_rate))
+        ))
+        if sys.byteorder == "big":
+            samples.byteswap()
+        self.audio = sr.AudioData(samples.tobytes(), sample_rate, 2)
+
+    def get_audio(self) -> Optional[sr.AudioData]:
+        return self.audio
+
+
+class _MockRecognitionHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        server: "MockRecognitionServer" = self.server.owner
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(max(0.0, random.gauss(server.latency, server.jitter)))
+        if random.random() < server.error_rate:
+            self.send_error(503, "Simulated failure")
+            return
+        # Same line-delimited layout as the Google Speech API v2
+        body = "\n".join([
+            json.dumps({"result": []}),
+            json.dumps({
+                "result": [{
+                    "alternative": [{"transcript": server.transcript, "confidence": 0.9}],
+                    "final": True,
+                }],
+                "result_index": 0,
+            }),
+        ]).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("Mock server: " + format, *args)
+
+
+class MockRecognitionServer:
+    """Local HTTP recognition service with configurable latency and failures
+
+    Accepts FLAC uploads like the Google Speech API and answers in its
+    response format, so the full encode/upload/parse path is exercised
+    without network access or quota.
+    """
+
+    def __init__(self,
+                 latency: float = 0.2,
+                 jitter: float = 0.05,
+                 error_rate: float = 0.0,
+                 transcript: str = "mock transcript",
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.transcript = transcript
+        self._server = ThreadingHTTPServer((host, port), _MockRecognitionHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/recognize"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-recognition-server", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class HttpRecognitionEngine(RecognitionEngine):
+    """Engine posting FLAC audio to a Google-compatible recognition endpoint
+
+    ``recognize_google`` always talks to Google; this engine lets load
+    tests target a ``MockRecognitionServer`` or a staging service instead.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Tuple[str, Optional[float]]:
+
+        flac_data = audio.get_flac_data(
+            convert_rate=None if audio.sample_rate >= 8000 else 8000,
+            convert_width=2
+        )
+        request = urllib.request.Request(
+            f"{self.url}?lang={language}",
+            data=flac_data,
+            headers={"Content-Type": f"audio/x-flac; rate={max(audio.sample_rate, 8000)}"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read().decode('utf-8')
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(f"API request error: {e}")
+
+        for line in body.split("\n"):
+            if not line:
+                continue
+            results = json.loads(line).get("result", [])
+            if results:
+                best = results[0]["alternative"][0]
+                return best["transcript"], best.get("confidence")
+        raise ValueError("Could not understand audio")
+
+
+class SourcePool:
+    """Fixed set of audio sources, each used by one request at a time
+
+    Sources with playback state (replays) thereby behave like independent
+    streams, one per concurrent session.
+    """
+
+    def __init__(self, sources: Sequence[AudioSource]):
+        self.size = len(sources)
+        self._available: "queue.Queue[AudioSource]" = queue.Queue()
+        for source in sources:
+            self._available.put(source)
+
+    def acquire(self) -> AudioSource:
+        return self._available.get()
+
+    def release(self, source: AudioSource):
+        self._available.put(source)
+
+    @classmethod
+    def from_files(cls, file_paths: Sequence[str], streams: int) -> "SourcePool":
+        return cls([FileSource(file_paths[i % len(file_paths)]) for i in range(streams)])
+
+    @classmethod
+    def from_session(cls, session_path: str, streams: int,
+                     speed: Optional[float] = None) -> "SourcePool":
+        session = Session.load(session_path)
+        return cls([ReplaySource(session, speed, loop=True) for _ in range(streams)])
+
+    @classmethod
+    def synthetic(cls, streams: int, duration: float = 3.0) -> "SourcePool":
+        shared = SyntheticSource(duration)
+        return cls([shared] * streams)
+
+
+class ResourceSampler:
+    """Samples process CPU utilisation and resident memory in the background"""
+
+    def __init__(self, interval: float = 1.0,
+                 extra: Optional[Callable[[], Dict]] = None):
+        self.interval = interval
+        self.extra = extra
+        self.samples: List[Dict] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def rss_bytes() -> int:
+        """Current resident set size; the peak on other Unixes, 0 on Windows"""
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            if sys.platform == "win32":
+                return 0
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            return peak if platform.system() == "Darwin" else peak * 1024
+
+    def _run(self):
+        started = last_wall = time.monotonic()
+        last_cpu = time.process_time()
+        while not self._stop.wait(self.interval):
+            wall, cpu = time.monotonic(), time.process_time()
+            sample = {
+                "elapsed_s": round(wall - started, 3),
+                "cpu_percent": round(100.0 * (cpu - last_cpu) / max(wall - last_wall, 1e-9), 1),
+                "rss_bytes": self.rss_bytes(),
+            }
+            if self.extra is not None:
+                sample.update(self.extra())
+            self.samples.append(sample)
+            last_wall, last_cpu = wall, cpu
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class LoadTestReport:
+    target_rate: Optional[float]
+    streams: int
+    duration_s: float
+    requests: int
+    successes: int
+    errors: Dict[str, int]
+    latencies_s: List[float] = field(repr=False)
+    resource_samples: List[Dict] = field(default_factory=list, repr=False)
+    # RSS before the first request, so growth during the run can be told
+    # apart from what the process already held
+    baseline_rss_bytes: int = 0
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.duration_s if self.duration_s else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return (self.requests - self.successes) / self.requests if self.requests else 0.0
+
+    @property
+    def saturated(self) -> bool:
+        """Whether the system failed to keep up with the offered rate"""
+        return self.target_rate is not None and self.throughput < 0.9 * self.target_rate
+
+    @property
+    def peak_rss_bytes(self) -> int:
+        return max((s["rss_bytes"] for s in self.resource_samples), default=0)
+
+    @property
+    def rss_growth_bytes(self) -> int:
+        return max(0, self.peak_rss_bytes - self.baseline_rss_bytes)
+
+    def latency_summary(self) -> Dict[str, float]:
+        ordered = sorted(self.latencies_s)
+        return {
+            "p50": percentile(ordered, 0.50),
+            "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99),
+            "max": ordered[-1] if ordered else 0.0,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "target_rate": self.target_rate,
+            "streams": self.streams,
+            "duration_s": self.duration_s,
+            "requests": self.requests,
+            "successes": self.successes,
+            "throughput": self.throughput,
+            "error_rate": self.error_rate,
+            "errors": self.errors,
+            "saturated": self.saturated,
+            "latency_s": self.latency_summary(),
+            "baseline_rss_bytes": self.baseline_rss_bytes,
+            "rss_growth_bytes": self.rss_growth_bytes,
+            "resources": self.resource_samples,
+        }
+
+    def format(self) -> str:
+        latency = self.latency_summary()
+        rate = f"{self.target_rate:g}/s" if self.target_rate is not None else "closed loop"
+        peak_cpu = max((s["cpu_percent"] for s in self.resource_samples), default=0.0)
+        lines = [
+            f"target {rate}, {self.streams} streams, {self.duration_s:.1f}s"
+            + (" [SATURATED]" if self.saturated else ""),
+            f"  requests {self.requests}, throughput {self.throughput:.2f}/s, "
+            f"errors {self.error_rate:.1%}",
+            "  latency p50 {p50:.3f}s  p95 {p95:.3f}s  p99 {p99:.3f}s  max {max:.3f}s".format(**latency),
+            f"  peak CPU {peak_cpu:.0f}%, peak RSS {self.peak_rss_bytes / 1024 / 1024:.1f} MiB "
+            f"(+{self.rss_growth_bytes / 1024 / 1024:.1f} MiB during the run)",
+        ]
+        for message, count in sorted(self.errors.items(), key=lambda item: -item[1]):
+            lines.append(f"  {count:6d} x {message}")
+        return "\n".join(lines)
+
+
+class LoadGenerator:
+    """Drives concurrent recognitions through a ``VoiceRecognitionSystem``
+
+    With a ``rate``, requests are issued open-loop on a fixed schedule
+    regardless of how fast earlier ones complete, and latency is measured
+    from each request's scheduled start, so queueing delay past the
+    saturation point shows up in the percentiles instead of silently
+    lowering the offered load. Without a rate, every stream issues its
+    next request as soon as the previous one finishes.
+
+    The system's history is switched off during a run unless
+    ``keep_history`` is set, so RSS reflects the recognition path rather
+    than an ever-growing list of results.
+    """
+
+    def __init__(self,
+                 system: VoiceRecognitionSystem,
+                 sources: SourcePool,
+                 language: Optional[LanguageCode] = None,
+                 sample_interval: float = 1.0,
+                 keep_history: bool = False):
+        self.system = system
+        self.sources = sources
+        self.language = language
+        self.sample_interval = sample_interval
+        self.keep_history = keep_history
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def _issue(self, scheduled: float, latencies: List[float],
+               errors: Dict[str, int], counts: List[int]):
+        source = self.sources.acquire()
+        try:
+            result = self.system.recognize_from_source(source, self.language)
+            error = None if result.success else (result.error_message or "Unknown error")
+        except Exception as e:
+            # Anything the system does not turn into a result is still a
+            # failed request, not a crashed worker
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            self.sources.release(source)
+        latency = time.monotonic() - scheduled
+        with self._lock:
+            self._in_flight -= 1
+            latencies.append(latency)
+            counts[0] += 1
+            if error is None:
+                counts[1] += 1
+            else:
+                errors[error] = errors.get(error, 0) + 1
+
+    def _resource_extra(self) -> Dict:
+        with self._lock:
+            return {"in_flight": self._in_flight}
+
+    def run(self,
+            duration: float,
+            rate: Optional[float] = None,
+            max_requests: Optional[int] = None) -> LoadTestReport:
+        """Generate load for ``duration`` seconds and return the report"""
+        latencies: List[float] = []
+        errors: Dict[str, int] = {}
+        counts = [0, 0]
+        sampler = ResourceSampler(self.sample_interval, self._resource_extra)
+        issued = 0
+
+        def take_ticket() -> bool:
+            nonlocal issued
+            with self._lock:
+                if time.monotonic() >= deadline or (
+                        max_requests is not None and issued >= max_requests):
+                    return False
+                issued += 1
+                self._in_flight += 1
+                return True
+
+        keep_history = self.system.keep_history
+        self.system.keep_history = keep_history and self.keep_history
+        try:
+            baseline_rss = ResourceSampler.rss_bytes()
+            started = time.monotonic()
+            deadline = started + duration
+            sampler.start()
+            # Requests beyond ``streams`` wait in the executor queue; with a
+            # rate that wait counts towards their latency
+            with ThreadPoolExecutor(max_workers=self.sources.size,
+                                    thread_name_prefix="load") as executor:
+                if rate is None:
+                    def stream_loop():
+                        while take_ticket():
+                            self._issue(time.monotonic(), latencies, errors, counts)
+                    for _ in range(self.sources.size):
+                        executor.submit(stream_loop)
+                else:
+                    interval = 1.0 / rate
+                    while True:
+                        scheduled = started + issued * interval
+                        delay = scheduled - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                        if not take_ticket():
+                            break
+                        executor.submit(self._issue, scheduled, latencies, errors, counts)
+            elapsed = time.monotonic() - started
+            sampler.stop()
+        finally:
+            self.system.keep_history = keep_history
+
+        return LoadTestReport(
+            target_rate=rate,
+            streams=self.sources.size,
+            duration_s=elapsed,
+            requests=counts[0],
+            successes=counts[1],
+            errors=errors,
+            latencies_s=latencies,
+            resource_samples=sampler.samples,
+            baseline_rss_bytes=baseline_rss,
+        )
+
+    def ramp(self, rates: Sequence[float], step_duration: float) -> List[LoadTestReport]:
+        """Run one step per rate, stopping after the first saturated step"""
+        reports = []
+        for rate in rates:
+            report = self.run(step_duration, rate)
+            reports.append(report)
+            logger.info("Load step %.2f/s: throughput %.2f/s, p99 %.3fs",
+                        rate, report.throughput, report.latency_summary()["p99"])
+            if report.saturated:
+                break
+        return reports
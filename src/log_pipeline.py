@@ -0,0 +1,131 @@
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+import json
+import logging
+import queue
+import sys
+
+
+PACKAGE_LOGGER = __name__.rpartition(".")[0] or __name__
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RESERVED_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line
+
+    Fields passed through ``extra`` (such as ``request_id`` and
+    ``timings``) are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queue handler that never blocks or formats on the calling thread
+
+    Records are handed to the background listener as-is, so message
+    formatting happens off the recognition path. When the queue is full
+    the record is dropped and counted rather than stalling the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Background-flushed logging for the package logger"""
+
+    def __init__(self,
+                 handlers: List[logging.Handler],
+                 level: int = logging.INFO,
+                 queue_size: int = 10000):
+        self.handlers = handlers
+        self.level = level
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = NonBlockingQueueHandler(self.queue)
+        self.listener = QueueListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        self.logger = logging.getLogger(PACKAGE_LOGGER)
+
+    @property
+    def dropped(self) -> int:
+        return self.queue_handler.dropped
+
+    def start(self):
+        self.logger.addHandler(self.queue_handler)
+        self.logger.setLevel(self.level)
+        # The pipeline owns output for the package; don't echo via root
+        self.logger.propagate = False
+        self.listener.start()
+
+    def stop(self):
+        """Detach from the package logger and flush queued records"""
+        self.logger.removeHandler(self.queue_handler)
+        self.logger.propagate = True
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def configure_logging(level: int = logging.INFO,
+                      json_format: bool = False,
+                      stream=None,
+                      file_path: Optional[str] = None,
+                      queue_size: int = 10000) -> LogPipeline:
+    """Send the package's log records through a background queue
+
+    Intended to be called once by applications; the library itself never
+    configures handlers. Calling it again replaces the previous pipeline.
+    """
+    global _pipeline
+    formatter = JsonFormatter() if json_format else logging.Formatter(DEFAULT_FORMAT)
+    handlers: List[logging.Handler] = []
+    if file_path:
+        handlers.append(logging.FileHandler(file_path, encoding='utf-8'))
+    if stream is not None or not file_path:
+        handlers.append(logging.StreamHandler(stream or sys.stderr))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    shutdown_logging()
+    _pipeline = LogPipeline(handlers, level=level, queue_size=queue_size)
+    _pipeline.start()
+    return _pipeline
+
+
+def shutdown_logging():
+    """Flush and remove the pipeline installed by ``configure_logging``"""
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
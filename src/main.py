@@ -1,112 +1,349 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict
 from datetime import datetime
 import logging
 import json
+import time
+import uuid
 import speech_recognition as sr
 
 from .constants import LanguageCode
 from .models import RecognitionResult
 from .audio_sources import AudioSource, MicrophoneSource, FileSource
 from .recognition_engines import RecognitionEngine
+from .profiling import stage, start_profiling_from_env
+from .fingerprint import FingerprintIndex, compute_fingerprint
+from .audio_archive import AudioArchive
+from .cancellation import CancellationToken, DeadlineExceeded, RequestCancelled
+from .result_sinks import ResultSink, SinkWorker
 
 
 class VoiceRecognitionSystem:
    
     def __init__(self, 
                  engine: RecognitionEngine,
-                 default_language: LanguageCode = LanguageCode.ENGLISH_US):
+                 default_language: LanguageCode = LanguageCode.ENGLISH_US,
+                 fingerprint_index: Optional[FingerprintIndex] = None,
+                 archive: Optional[AudioArchive] = None,
+                 request_timeout: Optional[float] = None,
+                 keep_history: bool = True):
         self.engine = engine
         self.default_language = default_language
+        # When set, near-duplicate clips reuse an earlier transcript
+        # instead of calling the engine again
+        self.fingerprint_index = fingerprint_index
+        # When set, the audio behind every result is kept for reprocessing
+        self.archive = archive
+        # Default deadline for each recognize_from_* call, in seconds
+        self.request_timeout = request_timeout
         self.history: List[RecognitionResult] = []
+        # Off for long unattended runs; sinks still receive every result
+        self.keep_history = keep_history
+        self._sink_workers: List[SinkWorker] = []
         self._setup_logging()
+        start_profiling_from_env()
     
     def _setup_logging(self):
-        """Setup logging configuration"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        """Get the module logger; output is configured by the application"""
         self.logger = logging.getLogger(__name__)
     
+    def _request_token(self,
+                       timeout: Optional[float],
+                       token: Optional[CancellationToken]) -> Optional[CancellationToken]:
+        """Token for one request: the caller's, bounded by the timeout"""
+        if timeout is None:
+            timeout = self.request_timeout
+        if timeout is None:
+            return token
+        return CancellationToken(timeout, parent=token)
+    
     def recognize_from_source(self, 
                             audio_source: AudioSource,
-                            language: Optional[LanguageCode] = None) -> RecognitionResult:
-        """Recognize speech from an audio source"""
+                            language: Optional[LanguageCode] = None,
+                            timeout: Optional[float] = None,
+                            token: Optional[CancellationToken] = None) -> RecognitionResult:
+        """Recognize speech from an audio source
+
+        Capture and recognition stop as soon as ``token`` is cancelled or
+        ``timeout`` seconds (default ``request_timeout``) pass, returning a
+        failed result with ``timed_out`` set on expiry.
+        """
         if language is None:
             language = self.default_language
         
-        lang_code = language.value
+        request_token = self._request_token(timeout, token)
+        try:
+            return self._recognize_from_source(audio_source, language.value, request_token)
+        finally:
+            if request_token is not None and request_token is not token:
+                request_token.detach()
+    
+    def _recognize_from_source(self,
+                               audio_source: AudioSource,
+                               lang_code: str,
+                               token: Optional[CancellationToken]) -> RecognitionResult:
+        request_id = uuid.uuid4().hex[:12]
+        timings: Dict[str, float] = {}
+        log_extra = {"request_id": request_id, "timings": timings}
         
         try:
-            audio = audio_source.get_audio()
-            if audio is None:
-                result = RecognitionResult(
-                    text="",
-                    language=lang_code,
-                    confidence=None,
-                    timestamp=datetime.now(),
-                    success=False,
-                    error_message="Failed to capture audio"
-                )
-                self.history.append(result)
-                return result
-            
-            text, confidence = self.engine.recognize(audio, lang_code)
-            
-            result = RecognitionResult(
-                text=text,
-                language=lang_code,
-                confidence=confidence,
-                timestamp=datetime.now(),
-                success=True
-            )
-            
-            self.logger.info(f"Recognition successful: {text}")
-            self.history.append(result)
-            return result
-            
-        except ValueError as e:
+            started = time.perf_counter()
+            with stage("source.get_audio"):
+                audio = audio_source.get_audio_cancellable(token)
+            timings["capture_s"] = time.perf_counter() - started
+        except (ValueError, ConnectionError, RequestCancelled) as e:
+            return self._failed_result(lang_code, request_id, e, log_extra)
+        
+        if audio is None:
             result = RecognitionResult(
                 text="",
                 language=lang_code,
                 confidence=None,
                 timestamp=datetime.now(),
                 success=False,
-                error_message=str(e)
+                error_message="Failed to capture audio",
+                request_id=request_id
             )
-            self.logger.warning(f"Recognition failed: {e}")
-            self.history.append(result)
+            self.logger.warning("Failed to capture audio", extra=log_extra)
+            self.record_result(result)
             return result
+        
+        self.archive_audio(audio, lang_code, request_id)
+        return self._recognize_audio(audio, lang_code, request_id, timings, token)
+    
+    def _recognize_audio(self,
+                         audio: sr.AudioData,
+                         lang_code: str,
+                         request_id: str,
+                         timings: Dict[str, float],
+                         token: Optional[CancellationToken] = None,
+                         use_fingerprints: bool = True,
+                         source: Optional[str] = None) -> RecognitionResult:
+        """Recognize captured audio and record the result"""
+        log_extra = {"request_id": request_id, "timings": timings}
+        try:
+            fingerprint = None
+            if self.fingerprint_index is not None and use_fingerprints:
+                started = time.perf_counter()
+                with stage("fingerprint"):
+                    fingerprint = compute_fingerprint(audio)
+                    match = self.fingerprint_index.query(fingerprint, lang_code)
+                timings["fingerprint_s"] = time.perf_counter() - started
+                if match is not None:
+                    result = RecognitionResult(
+                        text=match.text,
+                        language=lang_code,
+                        confidence=None,
+                        timestamp=datetime.now(),
+                        success=True,
+                        request_id=request_id,
+                        source=source
+                    )
+                    self.logger.info(
+                        "Reused transcript of near-duplicate clip %d (BER %.3f): %s",
+                        match.clip_id, match.bit_error_rate, match.text,
+                        extra=log_extra
+                    )
+                    self.record_result(result)
+                    return result
+            
+            started = time.perf_counter()
+            with stage("engine.recognize"):
+                text, confidence = self.engine.recognize_cancellable(
+                    audio, lang_code, token
+                )
+            timings["recognize_s"] = time.perf_counter() - started
+            
+            if fingerprint is not None and len(fingerprint):
+                self.fingerprint_index.add(fingerprint, text, lang_code)
             
-        except ConnectionError as e:
             result = RecognitionResult(
-                text="",
+                text=text,
                 language=lang_code,
-                confidence=None,
+                confidence=confidence,
                 timestamp=datetime.now(),
-                success=False,
-                error_message=str(e)
+                success=True,
+                request_id=request_id,
+                source=source
             )
-            self.logger.error(f"Connection error: {e}")
-            self.history.append(result)
+            
+            self.logger.info("Recognition successful: %s", text, extra=log_extra)
+            self.record_result(result)
             return result
+            
+        except (ValueError, ConnectionError, RequestCancelled) as e:
+            return self._failed_result(lang_code, request_id, e, log_extra, source)
+    
+    def _failed_result(self,
+                       lang_code: str,
+                       request_id: str,
+                       error: Exception,
+                       log_extra: Dict,
+                       source: Optional[str] = None) -> RecognitionResult:
+        result = RecognitionResult(
+            text="",
+            language=lang_code,
+            confidence=None,
+            timestamp=datetime.now(),
+            success=False,
+            error_message=str(error),
+            request_id=request_id,
+            timed_out=isinstance(error, DeadlineExceeded),
+            retryable=isinstance(error, (ConnectionError, DeadlineExceeded)),
+            source=source
+        )
+        if isinstance(error, RequestCancelled):
+            self.logger.warning("Request abandoned: %s", error, extra=log_extra)
+        elif isinstance(error, ConnectionError):
+            self.logger.error("Connection error: %s", error, extra=log_extra)
+        else:
+            self.logger.warning("Recognition failed: %s", error, extra=log_extra)
+        self.record_result(result)
+        return result
+    
+    def recognize_audio(self,
+                        audio: sr.AudioData,
+                        language: Optional[LanguageCode] = None,
+                        timeout: Optional[float] = None,
+                        token: Optional[CancellationToken] = None,
+                        source: Optional[str] = None) -> RecognitionResult:
+        """Recognize audio captured elsewhere, e.g. by a ``CaptureManager``
+
+        The audio is archived and the result recorded like any other;
+        ``source`` tags the result with the name of the input it came from.
+        """
+        if language is None:
+            language = self.default_language
+        
+        request_id = self.archive_audio(audio, language.value)
+        request_token = self._request_token(timeout, token)
+        try:
+            return self._recognize_audio(
+                audio, language.value, request_id, {}, request_token, source=source
+            )
+        finally:
+            if request_token is not None and request_token is not token:
+                request_token.detach()
+    
+    def archive_audio(self,
+                      audio: sr.AudioData,
+                      lang_code: str,
+                      request_id: Optional[str] = None) -> str:
+        """Store captured audio in the archive, if one is configured
+
+        Returns the result ID to put on the audio's ``RecognitionResult``.
+        """
+        if request_id is None:
+            request_id = uuid.uuid4().hex[:12]
+        if self.archive is not None:
+            try:
+                with stage("archive.append"):
+                    self.archive.append(request_id, audio, lang_code)
+            except OSError as e:
+                # Losing the audit copy must not fail the recognition
+                self.logger.error("Failed to archive audio: %s", e,
+                                  extra={"request_id": request_id})
+        return request_id
+    
+    def reprocess_archive(self,
+                          start: Optional[datetime] = None,
+                          end: Optional[datetime] = None,
+                          language: Optional[LanguageCode] = None,
+                          workers: int = 1) -> List[RecognitionResult]:
+        """Re-recognize archived audio captured in ``[start, end)``
+
+        Audio is streamed from the archive in storage order and recognized
+        with the current engine, skipping the fingerprint index so earlier
+        transcripts are not simply reused. Each new result is recorded in
+        the history and returned, in archive order; the original result ID
+        is logged as ``source_id``.
+        """
+        if self.archive is None:
+            raise ValueError("No audio archive configured")
+        
+        def recognize(item) -> RecognitionResult:
+            entry, audio = item
+            lang_code = language.value if language is not None else entry.language
+            request_id = uuid.uuid4().hex[:12]
+            self.logger.debug("Reprocessing archived audio", extra={
+                "request_id": request_id, "source_id": entry.result_id
+            })
+            token = self._request_token(None, None)
+            return self._recognize_audio(
+                audio, lang_code, request_id, {}, token, use_fingerprints=False
+            )
+        
+        items = self.archive.iter_audio(self.archive.find(start, end))
+        if workers <= 1:
+            return [recognize(item) for item in items]
+        
+        # Keep only a few segments per worker decompressed at a time
+        results: List[RecognitionResult] = []
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for item in items:
+                pending.append(executor.submit(recognize, item))
+                if len(pending) >= workers * 2:
+                    results.append(pending.popleft().result())
+            results.extend(future.result() for future in pending)
+        return results
     
     def recognize_from_microphone(self, 
                                  language: Optional[LanguageCode] = None,
-                                 duration: Optional[float] = None) -> RecognitionResult:
+                                 duration: Optional[float] = None,
+                                 timeout: Optional[float] = None,
+                                 token: Optional[CancellationToken] = None) -> RecognitionResult:
         mic_source = MicrophoneSource()
-        return self.recognize_from_source(mic_source, language)
+        return self.recognize_from_source(mic_source, language, timeout, token)
     
     def recognize_from_file(self, 
                            file_path: str,
-                           language: Optional[LanguageCode] = None) -> RecognitionResult:
+                           language: Optional[LanguageCode] = None,
+                           timeout: Optional[float] = None,
+                           token: Optional[CancellationToken] = None) -> RecognitionResult:
         file_source = FileSource(file_path)
-        return self.recognize_from_source(file_source, language)
+        return self.recognize_from_source(file_source, language, timeout, token)
+    
+    def record_result(self, result: RecognitionResult):
+        """Add a result to the history, e.g. one produced outside this class"""
+        if self.keep_history:
+            self.history.append(result)
+        for worker in self._sink_workers:
+            worker.offer(result)
+    
+    def add_sink(self,
+                 sink: ResultSink,
+                 batch_size: int = 100,
+                 flush_interval: float = 1.0,
+                 queue_size: int = 10000) -> SinkWorker:
+        """Send every recorded result to ``sink`` from a background thread"""
+        worker = SinkWorker(sink, batch_size, flush_interval, queue_size)
+        self._sink_workers = self._sink_workers + [worker]
+        return worker
+    
+    def remove_sink(self, worker: SinkWorker, timeout: Optional[float] = None):
+        """Stop sending results to a sink, delivering what it has queued"""
+        self._sink_workers = [w for w in self._sink_workers if w is not worker]
+        worker.close(timeout)
+    
+    def close_sinks(self, timeout: Optional[float] = None):
+        """Deliver queued results to every sink and close them"""
+        workers, self._sink_workers = self._sink_workers, []
+        for worker in workers:
+            worker.close(timeout)
+    
+    def get_sink_stats(self) -> List[Dict]:
+        return [worker.get_stats() for worker in self._sink_workers]
     
     def get_history(self) -> List[RecognitionResult]:
       
         return self.history
     
+    def get_history_page(self, start: int, count: int) -> List[RecognitionResult]:
+        """Return up to ``count`` results starting at history index ``start``"""
+        return self.history[max(0, start):max(0, start + count)]
+    
     def clear_history(self):
    
         self.history.clear()
@@ -118,13 +355,13 @@ class VoiceRecognitionSystem:
             with open(file_path, 'w', encoding='utf-8') as f:
                 history_dict = [result.to_dict() for result in self.history]
                 json.dump(history_dict, f, indent=2, ensure_ascii=False)
-            self.logger.info(f"History exported to {file_path}")
+            self.logger.info("History exported to %s", file_path)
         except Exception as e:
-            self.logger.error(f"Failed to export history: {e}")
+            self.logger.error("Failed to export history: %s", e)
     
     def set_language(self, language: LanguageCode):
         self.default_language = language
-        self.logger.info(f"Default language set to {language.value}")
+        self.logger.info("Default language set to %s", language.value)
     
     @staticmethod
     def list_available_languages() -> List[str]:
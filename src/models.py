@@ -13,6 +13,12 @@ class RecognitionResult:
     timestamp: datetime
     success: bool
     error_message: Optional[str] = None
+    request_id: Optional[str] = None
+    timed_out: bool = False
+    # Failed for a reason that may pass, e.g. a connection error or timeout
+    retryable: bool = False
+    # Name of the capture source, when several are recognized together
+    source: Optional[str] = None
     
     def to_dict(self) -> Dict:
         return {
@@ -21,7 +27,11 @@ class RecognitionResult:
             "confidence": self.confidence,
             "timestamp": self.timestamp.isoformat(),
             "success": self.success,
-            "error_message": self.error_message
+            "error_message": self.error_message,
+            "request_id": self.request_id,
+            "timed_out": self.timed_out,
+            "retryable": self.retryable,
+            "source": self.source
         }
     
     def to_json(self) -> str:
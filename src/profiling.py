@@ -0,0 +1,225 @@
+import speech_recognition as sr
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional
+import atexit
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from .fast_listener import FastListener
+
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_ENV_VAR = "VR_PROFILE"
+DEFAULT_PROFILE_DIR = "profiles"
+
+# Methods of the speech_recognition library wrapped with stage timers
+# while a session is active; nothing is patched when profiling is off.
+_INSTRUMENTED_METHODS = [
+    (sr.Recognizer, "record", "recognizer.record"),
+    (sr.Recognizer, "listen", "recognizer.listen"),
+    (FastListener, "listen", "listener.listen"),
+    (sr.AudioData, "get_flac_data", "audio.get_flac_data"),
+]
+
+_NULL_STAGE = nullcontext()
+_active_session: Optional["ProfilingSession"] = None
+_session_lock = threading.Lock()
+
+
+def stage(name: str):
+    """Time a pipeline stage; a shared no-op context when profiling is off"""
+    session = _active_session
+    if session is None:
+        return _NULL_STAGE
+    return session.stage(name)
+
+
+def get_active_session() -> Optional["ProfilingSession"]:
+    return _active_session
+
+
+class ProfilingSession:
+    """Profiles the recognition pipeline for the lifetime of a run
+
+    Produces, under ``output_dir``:
+
+    - ``<run>.pstats``: cProfile statistics for the thread that started
+      the session
+    - ``<run>.collapsed``: stack samples from every thread, in the
+      collapsed-stack format read by flamegraph tools
+    - ``<run>.alloc.txt``: top-N allocation sites from tracemalloc
+    - ``<run>.stages.json``: call counts and wall time per pipeline stage
+    """
+
+    def __init__(self,
+                 output_dir: str = DEFAULT_PROFILE_DIR,
+                 sample_interval: float = 0.005,
+                 top_n: int = 25,
+                 trace_frames: int = 10):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        self.trace_frames = trace_frames
+        self.run_name = datetime.now().strftime("profile-%Y%m%d-%H%M%S")
+        self.stage_stats: Dict[str, List[float]] = {}
+        self.samples: Counter = Counter()
+        self._profiler = cProfile.Profile()
+        self._sampler: Optional[threading.Thread] = None
+        self._running = threading.Event()
+        self._patched: List[tuple] = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats = self.stage_stats.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+
+    def _instrument(self):
+        for owner, attribute, name in _INSTRUMENTED_METHODS:
+            original = getattr(owner, attribute)
+
+            def wrapper(*args, _original=original, _name=name, **kwargs):
+                with self.stage(_name):
+                    return _original(*args, **kwargs)
+
+            setattr(owner, attribute, wrapper)
+            self._patched.append((owner, attribute, original))
+
+    def _restore(self):
+        for owner, attribute, original in reversed(self._patched):
+            setattr(owner, attribute, original)
+        self._patched.clear()
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        while self._running.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                    stack.append(f"{module}:{code.co_name}".replace(" ", "_"))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)).replace(" ", "_"))
+                self.samples[";".join(reversed(stack))] += 1
+            time.sleep(self.sample_interval)
+
+    def start(self):
+        """Begin profiling, sampling and allocation tracking"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracemalloc = True
+        self._instrument()
+        self._running.set()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="profiling-sampler", daemon=True
+        )
+        self._sampler.start()
+        self._profiler.enable()
+
+    def stop(self) -> Dict[str, str]:
+        """Stop profiling and write the reports; returns their paths"""
+        self._profiler.disable()
+        self._running.clear()
+        self._sampler.join()
+        self._restore()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return self._write_reports(snapshot, current, peak)
+
+    def _write_reports(self, snapshot, current: int, peak: int) -> Dict[str, str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.run_name)
+        paths = {
+            "pstats": f"{base}.pstats",
+            "collapsed": f"{base}.collapsed",
+            "alloc": f"{base}.alloc.txt",
+            "stages": f"{base}.stages.json",
+        }
+
+        self._profiler.dump_stats(paths["pstats"])
+
+        with open(paths["collapsed"], 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        with open(paths["alloc"], 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory: current={current} B, peak={peak} B\n")
+            f.write(f"Top {self.top_n} allocation sites:\n")
+            for stat in snapshot.statistics("lineno")[:self.top_n]:
+                f.write(f"{stat}\n")
+
+        with open(paths["stages"], 'w', encoding='utf-8') as f:
+            stages = {
+                name: {"calls": calls, "total_s": total, "max_s": longest}
+                for name, (calls, total, longest) in self.stage_stats.items()
+            }
+            json.dump(stages, f, indent=2)
+
+        logger.info("Profile written to %s.*", base)
+        return paths
+
+
+def start_profiling(output_dir: str = DEFAULT_PROFILE_DIR, **kwargs) -> ProfilingSession:
+    """Start the process-wide profiling session; reports are written at exit"""
+    global _active_session
+    with _session_lock:
+        if _active_session is not None:
+            return _active_session
+        session = ProfilingSession(output_dir, **kwargs)
+        session.start()
+        _active_session = session
+    atexit.register(stop_profiling)
+    return session
+
+
+def stop_profiling() -> Optional[Dict[str, str]]:
+    """Stop the process-wide session, if any, and write its reports"""
+    global _active_session
+    with _session_lock:
+        session = _active_session
+        _active_session = None
+    if session is None:
+        return None
+    return session.stop()
+
+
+def start_profiling_from_env() -> Optional[ProfilingSession]:
+    """Start profiling if ``VR_PROFILE`` is set
+
+    ``VR_PROFILE=1`` writes reports to ``./profiles``; any other value is
+    used as the output directory.
+    """
+    value = os.environ.get(PROFILE_ENV_VAR, "")
+    if value in ("", "0"):
+        return None
+    output_dir = DEFAULT_PROFILE_DIR if value == "1" else value
+    return start_profiling(output_dir)
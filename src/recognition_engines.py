@@ -1,6 +1,16 @@
 import speech_recognition as sr
-from typing import Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+import threading
 
+import numpy as np
+
+from .cancellation import CancellationToken, run_cancellable
+from .fast_listener import pcm_samples
+
+
+# Seconds an API request may take; bounds calls abandoned on cancellation
+DEFAULT_OPERATION_TIMEOUT = 30.0
 
 class RecognitionEngine:
 
@@ -8,13 +18,27 @@ class RecognitionEngine:
        
         raise NotImplementedError("Subclasses must implement recognize()")
 
+    def recognize_cancellable(self,
+                              audio: sr.AudioData,
+                              language: str,
+                              token: Optional[CancellationToken]) -> Tuple[str, Optional[float]]:
+        """``recognize`` that returns promptly once ``token`` is cancelled
+
+        The engine call (including encoding and network I/O) is abandoned
+        on a worker thread and its result discarded.
+        """
+        return run_cancellable(token, self.recognize, audio, language)
+
 
 class GoogleRecognitionEngine(RecognitionEngine):
 
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None,
+                 operation_timeout: Optional[float] = DEFAULT_OPERATION_TIMEOUT):
         self.api_key = api_key
         self.recognizer = sr.Recognizer()
+        # Bounds each API request, so abandoned calls don't linger forever
+        self.recognizer.operation_timeout = operation_timeout
     
     def recognize(self, audio: sr.AudioData, language: str) -> Tuple[str, Optional[float]]:
         
@@ -37,6 +61,9 @@ class GoogleRecognitionEngine(RecognitionEngine):
             raise ValueError("Could not understand audio")
         except sr.RequestError as e:
             raise ConnectionError(f"API request error: {e}")
+        except OSError as e:
+            # A read past operation_timeout isn't wrapped in RequestError
+            raise ConnectionError(f"API request error: {e}")
 
 
 class SphinxRecognitionEngine(RecognitionEngine):
@@ -52,4 +79,193 @@ class SphinxRecognitionEngine(RecognitionEngine):
         except sr.UnknownValueError:
             raise ValueError("Could not understand audio")
         except sr.RequestError as e:
-            raise ConnectionError(f"Sphinx error: {e}")
\ No newline at end of file
+            raise ConnectionError(f"Sphinx error: {e}")
+
+
+def sphinx_model_paths(language: str, model_root: Optional[str] = None) -> Dict[str, str]:
+    """Locate pocketsphinx model files for a language
+
+    ``model_root`` defaults to the models bundled with SpeechRecognition
+    and must follow the same ``<root>/<language>/...`` layout.
+    """
+    if model_root is None:
+        model_root = os.path.join(
+            os.path.dirname(os.path.realpath(sr.__file__)), "pocketsphinx-data"
+        )
+    language_directory = os.path.join(model_root, language)
+    paths = {
+        "hmm": os.path.join(language_directory, "acoustic-model"),
+        "lm": os.path.join(language_directory, "language-model.lm.bin"),
+        "dict": os.path.join(language_directory, "pronounciation-dictionary.dict"),
+    }
+    for path in paths.values():
+        if not os.path.exists(path):
+            raise ConnectionError(f"Sphinx error: missing model file {path}")
+    return paths
+
+
+class PCMConverter:
+    """Converts a chunked PCM stream to 16 kHz 16-bit mono for pocketsphinx
+
+    Resampling interpolates linearly between input samples. The last
+    sample and the position of the next output sample are carried across
+    chunks, so chunk boundaries don't introduce artifacts.
+    """
+
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, sample_rate: int, sample_width: int):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        # Input samples per output sample
+        self._step = sample_rate / self.SAMPLE_RATE
+        # Next output position, in input samples from the carried sample
+        self._position = 0.0
+        self._previous = np.zeros(0)
+
+    def convert(self, frames: bytes) -> bytes:
+        samples = pcm_samples(frames, self.sample_width)
+        if self.sample_width != self.SAMPLE_WIDTH:
+            # Shift into the 16-bit range, like audioop.lin2lin
+            samples = np.floor(samples * 2.0 ** (8 * (self.SAMPLE_WIDTH - self.sample_width)))
+        if self.sample_rate != self.SAMPLE_RATE:
+            samples = np.rint(self._resample(samples))
+        return np.clip(samples, -32768, 32767).astype('<i2').tobytes()
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        data = np.concatenate((self._previous, samples))
+        if not len(data):
+            return data
+        last = len(data) - 1
+        count = int((last - self._position) // self._step) + 1 if last >= self._position else 0
+        positions = self._position + self._step * np.arange(count)
+        resampled = np.interp(positions, np.arange(len(data)), data)
+        self._position += count * self._step - last
+        self._previous = data[-1:]
+        return resampled
+
+
+class SphinxStream:
+    """Incremental decode of one utterance, fed with raw PCM as it arrives"""
+
+    SAMPLE_RATE = PCMConverter.SAMPLE_RATE
+    SAMPLE_WIDTH = PCMConverter.SAMPLE_WIDTH
+
+    def __init__(self,
+                 engine: "StreamingSphinxEngine",
+                 decoder,
+                 language: str,
+                 sample_rate: int,
+                 sample_width: int,
+                 on_partial: Optional[Callable[[str], None]] = None):
+        self.engine = engine
+        self.decoder = decoder
+        self.language = language
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.on_partial = on_partial
+        self.partial_text = ""
+        self._converter = PCMConverter(sample_rate, sample_width)
+        self._since_partial = 0.0
+        self._closed = False
+        self.decoder.start_utt()
+        self._in_utterance = True
+
+    def process(self, frames: bytes) -> Optional[str]:
+        """Decode more audio; returns a new partial hypothesis when one is due"""
+        if self._closed:
+            return None
+        frames = self._converter.convert(frames)
+        self.decoder.process_raw(frames, False, False)
+        self._since_partial += len(frames) / (self.SAMPLE_RATE * self.SAMPLE_WIDTH)
+        if self._since_partial < self.engine.partial_interval:
+            return None
+
+        self._since_partial = 0.0
+        hypothesis = self.decoder.hyp()
+        text = hypothesis.hypstr if hypothesis is not None else ""
+        if not text or text == self.partial_text:
+            return None
+        self.partial_text = text
+        if self.on_partial is not None:
+            self.on_partial(text)
+        return text
+
+    def finish(self) -> Tuple[str, Optional[float]]:
+        """End the utterance and return the final hypothesis"""
+        if self._closed:
+            raise ValueError("Stream already finished")
+        try:
+            self.decoder.end_utt()
+            self._in_utterance = False
+            hypothesis = self.decoder.hyp()
+        finally:
+            self.close()
+        if hypothesis is None or not hypothesis.hypstr:
+            raise ValueError("Could not understand audio")
+        return hypothesis.hypstr, None
+
+    def close(self):
+        """Abandon the utterance and hand the decoder back to the engine"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._in_utterance:
+            self._in_utterance = False
+            self.decoder.end_utt()
+        self.engine._release_decoder(self.language, self.decoder)
+
+
+class StreamingSphinxEngine(SphinxRecognitionEngine):
+    """Offline pocketsphinx engine that can decode while audio is captured
+
+    ``start_stream`` returns a ``SphinxStream`` that accepts PCM frames as
+    they arrive and reports partial hypotheses every ``partial_interval``
+    seconds of audio. Decoders are created once per language and reused.
+    """
+
+    def __init__(self, partial_interval: float = 0.3):
+        super().__init__()
+        self.partial_interval = partial_interval
+        self._idle_decoders: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def _acquire_decoder(self, language: str):
+        with self._lock:
+            idle = self._idle_decoders.get(language)
+            if idle:
+                return idle.pop()
+        try:
+            import pocketsphinx
+        except ImportError:
+            raise ConnectionError("Sphinx error: missing PocketSphinx module")
+        return pocketsphinx.Decoder(logfn=os.devnull, **sphinx_model_paths(language))
+
+    def _release_decoder(self, language: str, decoder):
+        with self._lock:
+            self._idle_decoders.setdefault(language, []).append(decoder)
+
+    def start_stream(self,
+                     language: str,
+                     on_partial: Optional[Callable[[str], None]] = None,
+                     sample_rate: int = SphinxStream.SAMPLE_RATE,
+                     sample_width: int = SphinxStream.SAMPLE_WIDTH) -> SphinxStream:
+        """Begin decoding a new utterance"""
+        decoder = self._acquire_decoder(language)
+        return SphinxStream(
+            self, decoder, language, sample_rate, sample_width, on_partial
+        )
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Tuple[str, Optional[float]]:
+
+        stream = self.start_stream(
+            language,
+            sample_rate=audio.sample_rate,
+            sample_width=audio.sample_width
+        )
+        try:
+            stream.process(audio.get_raw_data())
+            return stream.finish()
+        finally:
+            stream.close()
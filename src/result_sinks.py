@@ -0,0 +1,240 @@
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from .models import RecognitionResult
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResultSink:
+    """Destination for recognition results, written a batch at a time
+
+    ``write_batch`` runs on the sink's own worker thread, never on a
+    recognition thread; raising from it marks the batch as failed.
+    """
+
+    def write_batch(self, results: List[RecognitionResult]):
+        raise NotImplementedError("Subclasses must implement write_batch()")
+
+    def close(self):
+        pass
+
+
+class JsonlFileSink(ResultSink):
+    """Append each result to a file as one JSON line"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = None
+
+    def write_batch(self, results: List[RecognitionResult]):
+        if self._file is None:
+            self._file = open(self.file_path, 'a', encoding='utf-8')
+        self._file.write("".join(
+            json.dumps(result.to_dict(), ensure_ascii=False) + "\n" for result in results
+        ))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SQLiteSink(ResultSink):
+    """Insert results into a SQLite table, one transaction per batch"""
+
+    COLUMNS = ("request_id", "timestamp", "language", "text", "confidence",
+               "success", "error_message", "timed_out", "source")
+
+    def __init__(self, database_path: str, table: str = "results"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.database_path = database_path
+        self.table = table
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first write, so the connection belongs to the worker thread
+        connection = sqlite3.connect(self.database_path)
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "request_id TEXT, timestamp TEXT, language TEXT, text TEXT, "
+            "confidence REAL, success INTEGER, error_message TEXT, "
+            "timed_out INTEGER, source TEXT)"
+        )
+        return connection
+
+    def write_batch(self, results: List[RecognitionResult]):
+        if self._connection is None:
+            self._connection = self._connect()
+        rows = []
+        for result in results:
+            row = result.to_dict()
+            rows.append(tuple(row[column] for column in self.COLUMNS))
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT INTO {self.table} ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class CallbackSink(ResultSink):
+    """Hand each batch to a function, off the recognition thread"""
+
+    def __init__(self, callback: Callable[[List[RecognitionResult]], None]):
+        self.callback = callback
+
+    def write_batch(self, results: List[RecognitionResult]):
+        self.callback(results)
+
+
+class WebhookSink(ResultSink):
+    """POST each batch as ``{"results": [...]}`` JSON to an HTTP endpoint"""
+
+    def __init__(self,
+                 url: str,
+                 timeout: float = 5.0,
+                 headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+
+    def write_batch(self, results: List[RecognitionResult]):
+        body = json.dumps(
+            {"results": [result.to_dict() for result in results]}, ensure_ascii=False
+        ).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(f"Webhook error: {e}")
+
+
+class SinkWorker:
+    """Bounded queue and delivery thread in front of one ``ResultSink``
+
+    ``offer`` never blocks: when the queue is full the oldest queued result
+    is dropped and counted, so a slow or stuck sink only loses its own
+    backlog. Results are delivered once ``batch_size`` are queued or the
+    oldest has waited ``flush_interval`` seconds. A failed batch is
+    retried up to ``retries`` times with growing delays, then dropped; no
+    error from the sink reaches the caller.
+    """
+
+    def __init__(self,
+                 sink: ResultSink,
+                 batch_size: int = 100,
+                 flush_interval: float = 1.0,
+                 queue_size: int = 10000,
+                 retries: int = 3,
+                 retry_delay: float = 0.5):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        # (enqueue time, result) pairs, oldest first
+        self._queue: deque = deque(maxlen=queue_size)
+        self._condition = threading.Condition()
+        self._closing = False
+        self._delivered = 0
+        self._dropped = 0
+        self._failed_batches = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"sink-{type(sink).__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def offer(self, result: RecognitionResult) -> bool:
+        """Queue a result; False if it could not be (worker closed)"""
+        with self._condition:
+            if self._closing:
+                return False
+            if len(self._queue) == self._queue.maxlen:
+                self._dropped += 1
+            self._queue.append((time.monotonic(), result))
+            # Wake the worker to start the flush timer, or to send a full batch
+            if len(self._queue) == 1 or len(self._queue) >= self.batch_size:
+                self._condition.notify()
+            return True
+
+    def _next_batch(self) -> Optional[List[RecognitionResult]]:
+        with self._condition:
+            while True:
+                if self._queue:
+                    waited = time.monotonic() - self._queue[0][0]
+                    if (len(self._queue) >= self.batch_size or self._closing
+                            or waited >= self.flush_interval):
+                        break
+                    self._condition.wait(self.flush_interval - waited)
+                elif self._closing:
+                    return None
+                else:
+                    self._condition.wait()
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft()[1] for _ in range(count)]
+
+    def _run(self):
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._deliver(batch)
+        finally:
+            try:
+                self.sink.close()
+            except Exception as e:
+                logger.error("Failed to close %s: %s", type(self.sink).__name__, e)
+
+    def _deliver(self, batch: List[RecognitionResult]):
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.write_batch(batch)
+            except Exception as e:
+                if attempt < self.retries and not self._closing:
+                    logger.warning("%s failed, retrying: %s", type(self.sink).__name__, e)
+                    time.sleep(self.retry_delay * 2 ** attempt)
+                    continue
+                logger.error("%s dropped a batch of %d results: %s",
+                             type(self.sink).__name__, len(batch), e)
+                with self._condition:
+                    self._failed_batches += 1
+                    self._dropped += len(batch)
+                return
+            with self._condition:
+                self._delivered += len(batch)
+            return
+
+    def close(self, timeout: Optional[float] = None):
+        """Deliver what is queued, then close the sink"""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        with self._condition:
+            return {
+                "sink": type(self.sink).__name__,
+                "queued": len(self._queue),
+                "delivered": self._delivered,
+                "dropped": self._dropped,
+                "failed_batches": self._failed_batches,
+            }
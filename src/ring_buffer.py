@@ -0,0 +1,103 @@
+import threading
+from typing import List, Optional
+
+
+class PCMRingBuffer:
+    """Fixed-size ring buffer of raw PCM bytes addressed by absolute offsets
+
+    Every byte ever written gets an absolute position. Only the most recent
+    ``capacity`` bytes are retained; older positions fall off the back.
+    """
+
+    def __init__(self, capacity: int, frame_width: int = 2):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        # Keep the capacity aligned to whole frames so reads never split a sample
+        self.frame_width = frame_width
+        self.capacity = capacity - (capacity % frame_width)
+        self._buffer = bytearray(self.capacity)
+        self._view = memoryview(self._buffer)
+        self._written = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        # Positions readers are blocked on; writes wake them only once reached
+        self._waiting: List[int] = []
+
+    @property
+    def written(self) -> int:
+        """Absolute position just past the newest byte"""
+        return self._written
+
+    @property
+    def oldest(self) -> int:
+        """Absolute position of the oldest byte still retained"""
+        return max(0, self._written - self.capacity)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, data: bytes):
+        """Append PCM data, overwriting the oldest bytes when full"""
+        data = memoryview(data)
+        if len(data) > self.capacity:
+            skipped = len(data) - self.capacity
+            data = data[skipped:]
+        else:
+            skipped = 0
+
+        with self._condition:
+            start = (self._written + skipped) % self.capacity
+            first = min(len(data), self.capacity - start)
+            self._view[start:start + first] = data[:first]
+            if first < len(data):
+                self._view[:len(data) - first] = data[first:]
+            self._written += skipped + len(data)
+            if self._waiting and self._written >= min(self._waiting):
+                self._condition.notify_all()
+
+    def read(self, start: int, end: int) -> bytes:
+        """Copy out the bytes between two absolute positions
+
+        Only the requested range is copied; positions that have already
+        been overwritten are clamped to the oldest retained byte.
+        """
+        with self._condition:
+            start = max(start, self.oldest)
+            end = min(end, self._written)
+            if end <= start:
+                return b""
+            offset = start % self.capacity
+            length = end - start
+            first = min(length, self.capacity - offset)
+            if first == length:
+                return bytes(self._view[offset:offset + length])
+            return bytes(self._view[offset:]) + bytes(self._view[:length - first])
+
+    def read_last(self, num_bytes: int) -> bytes:
+        """Copy out the most recent ``num_bytes`` bytes"""
+        end = self._written
+        return self.read(end - num_bytes, end)
+
+    def wait_for(self, position: int, timeout: Optional[float] = None) -> bool:
+        """Block until ``position`` has been written or the buffer is closed"""
+        with self._condition:
+            self._waiting.append(position)
+            try:
+                return self._condition.wait_for(
+                    lambda: self._written >= position or self._closed,
+                    timeout=timeout
+                ) and self._written >= position
+            finally:
+                self._waiting.remove(position)
+
+    def close(self):
+        """Wake up any waiting readers; no further data will arrive"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def reopen(self):
+        """Accept writes again after ``close``, keeping retained data"""
+        with self._condition:
+            self._closed = False
@@ -0,0 +1,272 @@
+import speech_recognition as sr
+from typing import Any, Callable, List, Optional, Tuple
+import json
+import logging
+import struct
+import threading
+import time
+
+from .audio_sources import AudioSource
+from .fast_listener import FastListener, rms
+
+
+logger = logging.getLogger(__name__)
+
+SESSION_MAGIC = b"VRSESSION1\n"
+_FRAME_HEADER = struct.Struct("<dI")
+# Arrival jitter below this is treated as continuous audio, not a gap
+GAP_TOLERANCE_SECONDS = 0.1
+
+
+class SessionRecorder:
+    """Writes captured audio frames and their arrival times to a session file
+
+    Layout: magic line, one JSON header line (sample rate, sample width,
+    creation time), then per frame an 8-byte arrival offset in seconds, a
+    4-byte length and the raw PCM bytes.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.sample_rate: Optional[int] = None
+        self.sample_width: Optional[int] = None
+        self.frames_written = 0
+        self._file = None
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    def _open(self, sample_rate: int, sample_width: int):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self._file = open(self.file_path, 'wb')
+        header = {
+            "sample_rate": sample_rate,
+            "sample_width": sample_width,
+            "created": time.time(),
+        }
+        self._file.write(SESSION_MAGIC)
+        self._file.write(json.dumps(header).encode('utf-8') + b"\n")
+        self._started = time.monotonic()
+
+    def write(self, frames: bytes, sample_rate: int, sample_width: int):
+        """Append a frame, stamped with its arrival time"""
+        with self._lock:
+            if self._file is None:
+                self._open(sample_rate, sample_width)
+            elif (sample_rate, sample_width) != (self.sample_rate, self.sample_width):
+                raise ValueError("Session audio format changed while recording")
+            offset = time.monotonic() - self._started
+            self._file.write(_FRAME_HEADER.pack(offset, len(frames)))
+            self._file.write(frames)
+            self.frames_written += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class Session:
+    """A recorded session loaded into memory"""
+
+    def __init__(self, sample_rate: int, sample_width: int,
+                 frames: List[Tuple[float, bytes]]):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frames = frames
+
+    @property
+    def duration(self) -> float:
+        """Length of the replayed audio, including silence between frames"""
+        if not self.frames:
+            return 0.0
+        audio_bytes = sum(len(data) for _, data in self.frames)
+        audio_seconds = audio_bytes / (self.sample_rate * self.sample_width)
+        return max(self.frames[-1][0], audio_seconds)
+
+    @classmethod
+    def load(cls, file_path: str) -> "Session":
+        with open(file_path, 'rb') as f:
+            if f.readline() != SESSION_MAGIC:
+                raise ValueError(f"{file_path} is not a recorded session")
+            header = json.loads(f.readline())
+            frames = []
+            while True:
+                frame_header = f.read(_FRAME_HEADER.size)
+                if len(frame_header) < _FRAME_HEADER.size:
+                    break
+                offset, length = _FRAME_HEADER.unpack(frame_header)
+                frames.append((offset, f.read(length)))
+        return cls(header["sample_rate"], header["sample_width"], frames)
+
+
+class _ReplayStream:
+    """File-like stream returning session audio paced like a live device
+
+    Gaps between recorded frames (e.g. between utterances delivered by a
+    plain ``MicrophoneSource``) are filled with silence, so readers see a
+    continuous stream. ``speed`` scales playback; ``None`` disables pacing.
+    """
+
+    def __init__(self, session: Session, speed: Optional[float]):
+        self.session = session
+        self.speed = speed
+        self._frames = iter(session.frames)
+        self._pending = bytearray()
+        self._position = 0
+        self._started = time.monotonic()
+        self._exhausted = False
+
+    def _fill(self, needed: int):
+        bytes_per_second = self.session.sample_rate * self.session.sample_width
+        while len(self._pending) < needed and not self._exhausted:
+            frame = next(self._frames, None)
+            if frame is None:
+                self._exhausted = True
+                break
+            offset, data = frame
+            # The frame finished arriving at ``offset``; pad any silence
+            # between the audio so far and the frame's start
+            queued = self._position + len(self._pending)
+            gap = int((offset * bytes_per_second) - len(data) - queued)
+            gap -= gap % self.session.sample_width
+            if gap > GAP_TOLERANCE_SECONDS * bytes_per_second:
+                self._pending.extend(bytes(gap))
+            self._pending.extend(data)
+
+    def read(self, num_frames: int) -> bytes:
+        needed = num_frames * self.session.sample_width
+        self._fill(needed)
+        data = bytes(self._pending[:needed])
+        del self._pending[:needed]
+        self._position += len(data)
+        if self.speed and data:
+            audio_time = self._position / (
+                self.session.sample_rate * self.session.sample_width
+            )
+            delay = self._started + audio_time / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    @property
+    def finished(self) -> bool:
+        return self._exhausted and not self._pending
+
+    def close(self):
+        self._exhausted = True
+        self._pending.clear()
+
+
+class ReplayMicrophone(sr.AudioSource):
+    """Drop-in replacement for ``sr.Microphone`` that plays a session
+
+    Works with ``Recognizer.listen`` and as the ``microphone`` of a
+    ``MicrophoneSource`` or ``BufferedMicrophoneSource``.
+    """
+
+    def __init__(self, session: Session, speed: Optional[float] = 1.0,
+                 chunk_size: int = 1024):
+        self.session = session
+        self.speed = speed
+        self.SAMPLE_RATE = session.sample_rate
+        self.SAMPLE_WIDTH = session.sample_width
+        self.CHUNK = chunk_size
+        self.stream: Optional[_ReplayStream] = None
+
+    def __enter__(self):
+        if self.stream is None:
+            self.stream = _ReplayStream(self.session, self.speed)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Keep the stream so the next ``with`` block continues where this
+        # one stopped, like a device that keeps running
+        pass
+
+    def rewind(self):
+        """Restart playback from the beginning"""
+        self.stream = None
+
+
+class ReplaySource(AudioSource):
+    """Audio source that replays a recorded session phrase by phrase"""
+
+    def __init__(self,
+                 session: Session,
+                 speed: Optional[float] = 1.0,
+                 timeout: Optional[float] = None,
+                 phrase_time_limit: Optional[float] = None,
+                 loop: bool = False):
+        super().__init__()
+        if isinstance(session, str):
+            session = Session.load(session)
+        self.session = session
+        self.microphone = ReplayMicrophone(session, speed)
+        self.listener = FastListener(self.recognizer)
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+        # Start over at the end of the session instead of returning None
+        self.loop = loop
+
+    def get_audio(self) -> Optional[sr.AudioData]:
+        """Return the next phrase, or None once the session is exhausted"""
+        audio = self._next_phrase()
+        if audio is None and self.loop:
+            self.microphone.rewind()
+            audio = self._next_phrase()
+        return audio
+
+    def _next_phrase(self) -> Optional[sr.AudioData]:
+        try:
+            with self.microphone as source:
+                audio = self.listener.listen(
+                    source,
+                    timeout=self.timeout,
+                    phrase_time_limit=self.phrase_time_limit
+                )
+        except sr.WaitTimeoutError as e:
+            logger.warning("Replay produced no phrase: %s", e)
+            return None
+        # At the end of the session listen() returns whatever trailing
+        # silence it collected; that is not a phrase
+        if (self.microphone.stream.finished and not self.listener.has_pending
+                and rms(audio.frame_data, audio.sample_width) <= self.recognizer.energy_threshold):
+            return None
+        return audio
+
+
+def replay_concurrently(session_path: str,
+                        copies: int,
+                        consumer: Callable[[ReplaySource], Any],
+                        speed: Optional[float] = 1.0) -> List[Any]:
+    """Run ``consumer`` on ``copies`` independent replays in parallel threads
+
+    Returns each consumer's return value (or the exception it raised), in
+    copy order.
+    """
+    session = Session.load(session_path)
+    results: List[Any] = [None] * copies
+
+    def run(index: int):
+        try:
+            results[index] = consumer(ReplaySource(session, speed))
+        except Exception as e:
+            results[index] = e
+
+    threads = [
+        threading.Thread(target=run, args=(index,), name=f"replay-{index}", daemon=True)
+        for index in range(copies)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
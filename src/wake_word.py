@@ -0,0 +1,164 @@
+import speech_recognition as sr
+from typing import Dict, Optional
+import logging
+import os
+import threading
+import time
+
+from .audio_sources import AudioSource, BufferedMicrophoneSource
+from .cancellation import CancellationToken, RequestCancelled
+from .recognition_engines import PCMConverter, sphinx_model_paths
+
+
+logger = logging.getLogger(__name__)
+
+
+class WakeWordDetector:
+    """Local keyphrase spotter built on pocketsphinx keyword search
+
+    Runs continuously on raw microphone frames and reports when the wake
+    phrase is heard. CPU time spent decoding and trigger counts are tracked
+    so ``threshold`` can be tuned against false triggers.
+    """
+
+    def __init__(self,
+                 keyphrase: str = "hey computer",
+                 threshold: float = 1e-20,
+                 language: str = "en-US"):
+        try:
+            import pocketsphinx
+        except ImportError:
+            raise ConnectionError("Sphinx error: missing PocketSphinx module")
+
+        paths = sphinx_model_paths(language)
+        self.keyphrase = keyphrase
+        self.threshold = threshold
+        self.decoder = pocketsphinx.Decoder(
+            hmm=paths["hmm"],
+            dict=paths["dict"],
+            keyphrase=keyphrase,
+            kws_threshold=threshold,
+            logfn=os.devnull
+        )
+        self._converter: Optional[PCMConverter] = None
+        self._lock = threading.Lock()
+        self._in_utterance = False
+        self.audio_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.detections = 0
+        self.false_triggers = 0
+
+    def process(self, frames: bytes, sample_rate: int, sample_width: int) -> bool:
+        """Feed captured audio; returns True when the wake phrase is detected"""
+        with self._lock:
+            started = time.thread_time()
+            converter = self._converter
+            if (converter is None or converter.sample_rate != sample_rate
+                    or converter.sample_width != sample_width):
+                converter = self._converter = PCMConverter(sample_rate, sample_width)
+            if not self._in_utterance:
+                self.decoder.start_utt()
+                self._in_utterance = True
+
+            frames = converter.convert(frames)
+            self.decoder.process_raw(frames, False, False)
+            detected = self.decoder.hyp() is not None
+            if detected:
+                # Restart the search so the same detection isn't reported twice
+                self.decoder.end_utt()
+                self._in_utterance = False
+                self.detections += 1
+
+            self.audio_seconds += len(frames) / (
+                PCMConverter.SAMPLE_RATE * PCMConverter.SAMPLE_WIDTH
+            )
+            self.cpu_seconds += time.thread_time() - started
+            return detected
+
+    def reset(self):
+        """Discard any partially heard phrase"""
+        with self._lock:
+            if self._in_utterance:
+                self.decoder.end_utt()
+                self._in_utterance = False
+
+    def mark_false_trigger(self):
+        """Record that the last detection was not followed by a usable command"""
+        with self._lock:
+            self.false_triggers += 1
+
+    def get_stats(self) -> Dict:
+        """Return CPU cost and trigger counts for tuning"""
+        with self._lock:
+            return {
+                "keyphrase": self.keyphrase,
+                "threshold": self.threshold,
+                "audio_seconds": self.audio_seconds,
+                "cpu_seconds": self.cpu_seconds,
+                "cpu_ratio": (self.cpu_seconds / self.audio_seconds
+                              if self.audio_seconds else 0.0),
+                "detections": self.detections,
+                "false_triggers": self.false_triggers,
+            }
+
+
+class WakeWordSource(AudioSource):
+    """Audio source that only yields speech following the wake phrase
+
+    Wrapping a ``BufferedMicrophoneSource`` means only commands spoken
+    after the keyphrase reach the recognition engine.
+    """
+
+    def __init__(self,
+                 detector: WakeWordDetector,
+                 mic_source: Optional[BufferedMicrophoneSource] = None,
+                 command_timeout: float = 5.0,
+                 phrase_time_limit: Optional[float] = 10.0):
+        super().__init__()
+        self.detector = detector
+        self.mic_source = mic_source or BufferedMicrophoneSource()
+        self.recognizer = self.mic_source.recognizer
+        self.command_timeout = command_timeout
+        self.phrase_time_limit = phrase_time_limit
+
+    def wait_for_wake_word(self, timeout: Optional[float] = None,
+                           token: Optional[CancellationToken] = None) -> bool:
+        """Block until the wake phrase is heard or ``timeout`` seconds pass"""
+        for chunk in self.mic_source.iter_chunks(timeout=timeout, token=token):
+            if self.detector.process(
+                chunk, self.mic_source.sample_rate, self.mic_source.sample_width
+            ):
+                logger.info("Wake phrase detected: %s", self.detector.keyphrase)
+                return True
+        return False
+
+    def listen_for_command(self,
+                           token: Optional[CancellationToken] = None
+                           ) -> Optional[sr.AudioData]:
+        """Capture the command after a detection, counting silent triggers"""
+        try:
+            return self.mic_source.listen(
+                timeout=self.command_timeout,
+                phrase_time_limit=self.phrase_time_limit,
+                token=token
+            )
+        except sr.WaitTimeoutError:
+            self.detector.mark_false_trigger()
+            raise
+
+    def get_audio(self, token: Optional[CancellationToken] = None) -> Optional[sr.AudioData]:
+        """Wait for the wake phrase, then capture the following command"""
+        try:
+            if not self.mic_source.is_calibrated:
+                self.mic_source.adjust_for_ambient_noise(duration=1, token=token)
+            if not self.wait_for_wake_word(token=token):
+                return None
+            return self.listen_for_command(token)
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            logger.error("Error capturing audio: %s", e)
+            return None
+
+    def get_audio_cancellable(self, token: Optional[CancellationToken]) -> Optional[sr.AudioData]:
+        return self.get_audio(token)